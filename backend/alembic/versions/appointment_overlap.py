@@ -0,0 +1,56 @@
+"""Appointment time ranges and non-overlap constraint
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 12:00:00.000000
+
+On PostgreSQL this adds a generated tsrange column and an exclusion
+constraint, so two non-cancelled appointments of the same doctor can never
+overlap, whichever code path inserts them. Existing overlapping rows must be
+cancelled before upgrading or the constraint cannot be created.
+
+Other databases (SQLite in development) only get the composite index that
+the application-level overlap check uses.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_appointments_doctor_time', 'appointments',
+        ['doctor_id', 'appointment_time', 'end_time']
+    )
+    
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    
+    op.create_check_constraint(
+        'ck_appointments_end_after_start', 'appointments', 'end_time > appointment_time'
+    )
+    # Lets the GiST index combine equality on doctor_id with range overlap
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute(
+        "ALTER TABLE appointments ADD COLUMN time_range tsrange "
+        "GENERATED ALWAYS AS (tsrange(appointment_time, end_time, '[)')) STORED"
+    )
+    # The constraint's GiST index also serves the overlap queries
+    op.execute(
+        "ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap "
+        "EXCLUDE USING gist (doctor_id WITH =, time_range WITH &&) "
+        "WHERE (status <> 'cancelled')"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE appointments DROP CONSTRAINT appointments_no_overlap')
+        op.drop_column('appointments', 'time_range')
+        op.drop_constraint('ck_appointments_end_after_start', 'appointments', type_='check')
+    op.drop_index('ix_appointments_doctor_time', table_name='appointments')
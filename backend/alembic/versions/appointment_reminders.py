@@ -0,0 +1,27 @@
+"""Appointment reminders
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('appointments', sa.Column('reminder_sent_at', sa.DateTime(), nullable=True))
+    
+    # The reminder job walks one day's scheduled appointments in time order
+    op.create_index('ix_appointments_time_status', 'appointments', ['appointment_time', 'status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_appointments_time_status', table_name='appointments')
+    op.drop_column('appointments', 'reminder_sent_at')
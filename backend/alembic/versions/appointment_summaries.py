@@ -0,0 +1,33 @@
+"""Appointment summaries
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('appointments', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('appointments', sa.Column('summary_generated_at', sa.DateTime(), nullable=True))
+    
+    # Lets the batch job find completed appointments still waiting for a summary
+    op.create_index(
+        'ix_appointments_completed_without_summary', 'appointments', ['id'],
+        postgresql_where=sa.text("status = 'completed' AND summary IS NULL"),
+        sqlite_where=sa.text("status = 'completed' AND summary IS NULL")
+    )
+
+
+def downgrade():
+    op.drop_index('ix_appointments_completed_without_summary', table_name='appointments')
+    op.drop_column('appointments', 'summary_generated_at')
+    op.drop_column('appointments', 'summary')
@@ -0,0 +1,29 @@
+"""Entity versions for ETags
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-20 09:00:00.000000
+
+Version counters bumped by every write path, shared by all workers so that
+ETags change everywhere as soon as any worker writes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('entity_versions',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('entity_versions')
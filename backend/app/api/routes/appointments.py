@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Body, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, date
@@ -9,6 +11,13 @@ from app.schemas import appointment as appointment_schemas
 from app.services.appointment_service import AppointmentService
 from app.services.calendar_service import CalendarService
 from app.services.email_service import EmailService
+from app.services.booking_context import BookingContext
+from app.services.slot_hold_service import slot_holds, SlotUnavailableError, HoldNotFoundError
+from app.services.idempotency_service import (
+    idempotency_service, IdempotencyConflictError, IdempotencyInProgressError
+)
+from app.db.overlap import insert_appointment, apply_appointment_update, AppointmentOverlapError
+from app.core.etag import versions
 
 router = APIRouter(prefix="/appointments", tags=["appointments"])
 
@@ -72,6 +81,7 @@ async def get_appointments(
             "diagnosis": appointment.diagnosis,
             "created_at": appointment.created_at,
             "calendar_event_id": appointment.calendar_event_id,
+            "summary": appointment.summary,
             "doctor_name": doctor_name,
             "patient_name": patient_name
         }
@@ -112,6 +122,7 @@ async def get_appointment(
         "diagnosis": appointment.diagnosis,
         "created_at": appointment.created_at,
         "calendar_event_id": appointment.calendar_event_id,
+        "summary": appointment.summary,
         "doctor_name": doctor_name,
         "patient_name": patient_name
     }
@@ -121,39 +132,157 @@ async def get_appointment(
 @router.post("/", response_model=appointment_schemas.AppointmentInDB, status_code=status.HTTP_201_CREATED)
 async def create_appointment(
     appointment_data: appointment_schemas.AppointmentCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db)
 ):
-    """Create a new appointment."""
+    """Create a new appointment.
+    
+    Retries that send the same Idempotency-Key and body get the original
+    response back without booking, calendaring or emailing again.
+    """
+    if idempotency_key:
+        request_hash = idempotency_service.request_hash(appointment_data.dict())
+        try:
+            replay = idempotency_service.begin(db, "appointments", idempotency_key, request_hash)
+        except IdempotencyConflictError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        except IdempotencyInProgressError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        if replay is not None:
+            status_code, body = replay
+            return JSONResponse(status_code=status_code, content=body, headers={"Idempotent-Replayed": "true"})
+    
+    booked = []
+    
+    def complete_key(appointment: models.Appointment) -> None:
+        booked.append(appointment)
+        if idempotency_key:
+            body = jsonable_encoder(appointment_schemas.AppointmentInDB(**{
+                column.name: getattr(appointment, column.name) for column in models.Appointment.__table__.columns
+            }))
+            idempotency_service.complete(
+                db, "appointments", idempotency_key, request_hash, status.HTTP_201_CREATED, body
+            )
+    
     try:
-        # Create appointment in database
-        appointment = appointment_service.create_appointment(db, appointment_data)
+        try:
+            slot_holds.check_free(
+                appointment_data.doctor_id,
+                appointment_data.appointment_time,
+                appointment_data.end_time,
+                appointment_data.patient_id
+            )
+        except SlotUnavailableError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
         
-        # Add to Google Calendar
-        calendar_event_id = calendar_service.create_calendar_event(
+        # The key is completed as soon as the appointment row exists, so a
+        # retry after a failed calendar or email step gets the booking back
+        appointment = _book_appointment(db, appointment_data, on_inserted=complete_key)
+    except Exception:
+        if idempotency_key and not booked:
+            idempotency_service.abandon(db, "appointments", idempotency_key)
+        raise
+    
+    # Store the final response, which includes the calendar event ID
+    complete_key(appointment)
+    
+    return appointment
+
+@router.post("/holds", response_model=appointment_schemas.SlotHold, status_code=status.HTTP_201_CREATED)
+async def hold_slot(
+    hold_data: appointment_schemas.SlotHoldCreate,
+    db: Session = Depends(get_db)
+):
+    """Reserve a slot for a few minutes while the patient completes the booking."""
+    try:
+        hold = slot_holds.hold_available(
             db,
-            appointment.id,
-            appointment_data.doctor_id,
-            appointment_data.patient_id,
-            appointment_data.appointment_time,
-            appointment_data.end_time,
-            appointment_data.reason
+            hold_data.doctor_id,
+            hold_data.patient_id,
+            hold_data.appointment_time,
+            hold_data.end_time,
+            hold_data.ttl_seconds
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SlotUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    
+    return hold.to_dict()
+
+@router.post("/holds/{hold_id}/confirm", response_model=appointment_schemas.AppointmentInDB,
+             status_code=status.HTTP_201_CREATED)
+async def confirm_slot_hold(
+    hold_id: str,
+    confirm_data: appointment_schemas.SlotHoldConfirm = Body(default=appointment_schemas.SlotHoldConfirm()),
+    db: Session = Depends(get_db)
+):
+    """Book the appointment for a held slot."""
+    try:
+        with slot_holds.confirming(hold_id) as hold:
+            appointment_data = appointment_schemas.AppointmentCreate(
+                doctor_id=hold.doctor_id,
+                patient_id=hold.patient_id,
+                appointment_time=hold.start,
+                end_time=hold.end,
+                reason=confirm_data.reason,
+                symptoms=confirm_data.symptoms
+            )
+            return _book_appointment(db, appointment_data)
+    except HoldNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.delete("/holds/{hold_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def release_slot_hold(hold_id: str):
+    """Release a held slot without booking it."""
+    try:
+        slot_holds.release(hold_id)
+    except HoldNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return
+
+def _book_appointment(db: Session, appointment_data: appointment_schemas.AppointmentCreate, on_inserted=None):
+    """Create the appointment, add it to the calendar and send the confirmation.
+    
+    `on_inserted(appointment)` is called once the appointment row is committed.
+    """
+    try:
+        # Create appointment in database; overlaps are rejected by the database
+        # Versions are staged first so they commit with the insert
+        versions.bump(
+            db,
+            ("doctor_appointments", appointment_data.doctor_id),
+            ("patient_appointments", appointment_data.patient_id)
+        )
+        appointment = insert_appointment(db, models.Appointment(**appointment_data.dict()))
+        if on_inserted:
+            on_inserted(appointment)
+        
+        # Doctor and patient rows are loaded once for the calendar and email steps
+        context = BookingContext.load(db, appointment)
         
-        # Update appointment with calendar event ID
+        # Add to Google Calendar
+        calendar_event_id = calendar_service.create_booking_event(context) if context else None
+        
+        # Save the calendar event ID before the email, so a failed enqueue can't lose it
         if calendar_event_id:
-            appointment_service.update_appointment_calendar_id(
-                db, appointment.id, calendar_event_id
-            )
+            appointment.calendar_event_id = calendar_event_id
+            db.commit()
         
-        # Send email confirmation
-        email_service.send_appointment_confirmation(
-            db, appointment.id, appointment_data.doctor_id, appointment_data.patient_id
-        )
+        # Send email confirmation; the booking stands even if it can't be queued
+        if context:
+            try:
+                email_service.send_booking_confirmation(db, context)
+            except Exception as e:
+                print(f"Error queueing confirmation for appointment {appointment.id}: {e}")
         
         return appointment
     except HTTPException as e:
         # Re-raise HTTPExceptions
         raise e
+    except AppointmentOverlapError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -171,12 +300,15 @@ async def update_appointment(
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
-    # Update fields
-    for key, value in appointment_data.dict(exclude_unset=True).items():
-        setattr(appointment, key, value)
-    
-    db.commit()
-    db.refresh(appointment)
+    versions.bump(
+        db,
+        ("doctor_appointments", appointment.doctor_id),
+        ("patient_appointments", appointment.patient_id)
+    )
+    try:
+        apply_appointment_update(db, appointment, appointment_data.dict(exclude_unset=True))
+    except AppointmentOverlapError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     
     return appointment
 
@@ -192,6 +324,11 @@ async def delete_appointment(
     
     # Mark as cancelled instead of deleting
     appointment.status = models.AppointmentStatus.CANCELLED
+    versions.bump(
+        db,
+        ("doctor_appointments", appointment.doctor_id),
+        ("patient_appointments", appointment.patient_id)
+    )
     db.commit()
     
     return
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Dict, Any
+
+from app.core.security import get_current_active_user
+from app.services.chat_session_service import chat_service
+from app.schemas import chat as chat_schemas
+
+router = APIRouter(prefix="/chat", tags=["chat"])
+
+@router.post("", response_model=chat_schemas.ChatResponse)
+async def send_chat_message(
+    request: chat_schemas.ChatRequest,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Send a message to the assistant within a server-side conversation."""
+    if not request.prompt.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Prompt must not be empty")
+
+    # Clients that don't track a session id get one conversation per user
+    session_id = request.session_id or f"user-{current_user['id']}"
+    result = await chat_service.send_message(session_id, current_user, request.prompt)
+    return {**result, "timestamp": datetime.now()}
+
+@router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def end_chat_session(
+    session_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Forget a conversation."""
+    if not chat_service.store.delete(session_id, current_user["id"]):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat session not found")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -6,12 +6,22 @@ from app.db.database import get_db
 from app.db import models
 from app.schemas import doctor as doctor_schemas
 from app.core.security import get_password_hash
+from app.core.etag import versions, conditional_response
+from app.services.doctor_index import doctor_index
 
 router = APIRouter(prefix="/doctors", tags=["doctors"])
 
 @router.get("/", response_model=List[doctor_schemas.DoctorWithUser])
-async def get_doctors(db: Session = Depends(get_db)):
+async def get_doctors(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """Get all doctors."""
+    not_modified = conditional_response(request, response, versions.etag(db, ("doctors",)))
+    if not_modified:
+        return not_modified
+    
     doctors = db.query(models.Doctor).join(models.User).filter(models.User.is_active == True).all()
     
     result = []
@@ -33,9 +43,18 @@ async def get_doctors(db: Session = Depends(get_db)):
 @router.get("/{doctor_id}", response_model=doctor_schemas.DoctorWithUser)
 async def get_doctor(
     doctor_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Get a doctor by ID."""
+    not_modified = conditional_response(
+        request, response, versions.etag(db, ("doctor", doctor_id)),
+        exists=lambda: db.query(models.Doctor.id).filter(models.Doctor.id == doctor_id).first() is not None
+    )
+    if not_modified:
+        return not_modified
+    
     doctor = db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
@@ -84,8 +103,11 @@ async def create_doctor(
     )
     
     db.add(doctor)
+    db.flush()
+    versions.bump(db, ("doctors",), ("doctor", doctor.id))
     db.commit()
     db.refresh(doctor)
+    doctor_index.invalidate()
     
     # Return combined doctor and user information
     doctor_dict = {
@@ -121,8 +143,10 @@ async def update_doctor(
             # Update doctor fields
             setattr(doctor, key, value)
     
+    versions.bump(db, ("doctors",), ("doctor", doctor.id))
     db.commit()
     db.refresh(doctor)
+    doctor_index.invalidate()
     
     # Return updated doctor
     doctor_dict = {
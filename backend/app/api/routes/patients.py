@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -6,12 +6,21 @@ from app.db.database import get_db
 from app.db import models
 from app.schemas import patient as patient_schemas
 from app.core.security import get_password_hash
+from app.core.etag import versions, conditional_response
 
 router = APIRouter(prefix="/patients", tags=["patients"])
 
 @router.get("/", response_model=List[patient_schemas.PatientWithUser])
-async def get_patients(db: Session = Depends(get_db)):
+async def get_patients(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """Get all patients."""
+    not_modified = conditional_response(request, response, versions.etag(db, ("patients",)))
+    if not_modified:
+        return not_modified
+    
     patients = db.query(models.Patient).join(models.User).filter(models.User.is_active == True).all()
     
     result = []
@@ -33,9 +42,18 @@ async def get_patients(db: Session = Depends(get_db)):
 @router.get("/{patient_id}", response_model=patient_schemas.PatientWithUser)
 async def get_patient(
     patient_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Get a patient by ID."""
+    not_modified = conditional_response(
+        request, response, versions.etag(db, ("patient", patient_id)),
+        exists=lambda: db.query(models.Patient.id).filter(models.Patient.id == patient_id).first() is not None
+    )
+    if not_modified:
+        return not_modified
+    
     patient = db.query(models.Patient).filter(models.Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
@@ -84,6 +102,8 @@ async def create_patient(
     )
     
     db.add(patient)
+    db.flush()
+    versions.bump(db, ("patients",), ("patient", patient.id))
     db.commit()
     db.refresh(patient)
     
@@ -121,6 +141,7 @@ async def update_patient(
             # Update patient fields
             setattr(patient, key, value)
     
+    versions.bump(db, ("patients",), ("patient", patient.id))
     db.commit()
     db.refresh(patient)
     
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -20,20 +21,114 @@ class Settings(BaseSettings):
     LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4-turbo")
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
     GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-pro")
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "gemini")  # "gemini" or "fake"
+    FAKE_LLM_LATENCY_SECONDS: float = float(os.getenv("FAKE_LLM_LATENCY_SECONDS", "0.5"))
+    FAKE_LLM_TOKENS_PER_SECOND: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "50"))
+    FAKE_LLM_FAILURE_RATE: float = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0"))
+    FAKE_LLM_SEED: Optional[int] = int(os.getenv("FAKE_LLM_SEED")) if os.getenv("FAKE_LLM_SEED") else None
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_PROMPT_TOKEN_BUDGET: int = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "3000"))
+    LLM_HISTORY_SUMMARY_TOKENS: int = int(os.getenv("LLM_HISTORY_SUMMARY_TOKENS", "400"))
+    LLM_HISTORY_CACHE_ENTRIES: int = int(os.getenv("LLM_HISTORY_CACHE_ENTRIES", "5000"))
+    
+    # LLM response cache. Responses can contain patient data, so they are only
+    # kept in memory unless LLM_CACHE_PATH names a SQLite file; on disk they are
+    # retained until LLM_CACHE_TTL_SECONDS after creation (expired rows are
+    # deleted when read) and capped at LLM_CACHE_DISK_ENTRIES rows.
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "")
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+    LLM_CACHE_MEMORY_ENTRIES: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+    LLM_CACHE_DISK_ENTRIES: int = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "50000"))
     
     # Google API Settings
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
     GOOGLE_REDIRECT_URI: str = os.getenv("GOOGLE_REDIRECT_URI", "")
+    # Root URL override for the Calendar API, e.g. a local fake server in tests
+    GOOGLE_CALENDAR_API_ENDPOINT: str = os.getenv("GOOGLE_CALENDAR_API_ENDPOINT", "")
+    GOOGLE_CALENDAR_CLIENT_CACHE_SIZE: int = int(os.getenv("GOOGLE_CALENDAR_CLIENT_CACHE_SIZE", "100"))
     
     # Email Settings
     EMAIL_SENDER: str = os.getenv("EMAIL_SENDER", "")
     EMAIL_PASSWORD: str = os.getenv("EMAIL_PASSWORD", "")
     SMTP_SERVER: str = os.getenv("SMTP_SERVER", "smtp.gmail.com")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_USE_TLS: bool = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    SMTP_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+    SMTP_HEALTH_CHECK_AFTER_SECONDS: float = float(os.getenv("SMTP_HEALTH_CHECK_AFTER_SECONDS", "30"))
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+    # Email outbox workers
+    EMAIL_QUEUE_WORKERS: int = int(os.getenv("EMAIL_QUEUE_WORKERS", "2"))
+    EMAIL_QUEUE_BATCH_SIZE: int = int(os.getenv("EMAIL_QUEUE_BATCH_SIZE", "50"))
+    EMAIL_QUEUE_POLL_SECONDS: float = float(os.getenv("EMAIL_QUEUE_POLL_SECONDS", "2"))
+    EMAIL_QUEUE_CLAIM_SECONDS: float = float(os.getenv("EMAIL_QUEUE_CLAIM_SECONDS", "300"))
+    EMAIL_QUEUE_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_QUEUE_MAX_ATTEMPTS", "6"))
+    EMAIL_QUEUE_MAX_BACKOFF_SECONDS: float = float(os.getenv("EMAIL_QUEUE_MAX_BACKOFF_SECONDS", "3600"))
+    # Next-day appointment reminders
+    REMINDER_JOB_CHUNK_SIZE: int = int(os.getenv("REMINDER_JOB_CHUNK_SIZE", "500"))
+    REMINDER_JOB_BATCH_SIZE: int = int(os.getenv("REMINDER_JOB_BATCH_SIZE", "50"))
+    REMINDER_JOB_CONCURRENCY: int = int(os.getenv("REMINDER_JOB_CONCURRENCY", "4"))
+    
+    # Email, Slack and prompt templates
+    TEMPLATE_DIR: str = os.getenv(
+        "TEMPLATE_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+    )
     
     # Notification Settings
     SLACK_WEBHOOK_URL: str = os.getenv("SLACK_WEBHOOK_URL", "")
+    SLACK_TIMEOUT_SECONDS: float = float(os.getenv("SLACK_TIMEOUT_SECONDS", "10"))
+    SLACK_MAX_RETRIES: int = int(os.getenv("SLACK_MAX_RETRIES", "5"))
+    SLACK_MAX_BACKOFF_SECONDS: float = float(os.getenv("SLACK_MAX_BACKOFF_SECONDS", "60"))
+    # Reports for the same channel within this window go out as one message
+    SLACK_COALESCE_SECONDS: float = float(os.getenv("SLACK_COALESCE_SECONDS", "5"))
+    SLACK_MAX_MESSAGE_CHARS: int = int(os.getenv("SLACK_MAX_MESSAGE_CHARS", "3500"))
+    
+    # Batch appointment summaries
+    SUMMARY_JOB_CONCURRENCY: int = int(os.getenv("SUMMARY_JOB_CONCURRENCY", "4"))
+    SUMMARY_JOB_MAX_RETRIES: int = int(os.getenv("SUMMARY_JOB_MAX_RETRIES", "3"))
+    
+    # Slot holds
+    SLOT_HOLD_TTL_SECONDS: float = float(os.getenv("SLOT_HOLD_TTL_SECONDS", "300"))
+    SLOT_HOLD_MAX_TTL_SECONDS: float = float(os.getenv("SLOT_HOLD_MAX_TTL_SECONDS", "900"))
+    
+    # Idempotency keys
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_SECONDS: float = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "120"))
+    IDEMPOTENCY_MEMORY_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MEMORY_ENTRIES", "10000"))
+    
+    # Chat sessions
+    CHAT_MAX_SESSIONS: int = int(os.getenv("CHAT_MAX_SESSIONS", "1000"))
+    CHAT_MAX_TOTAL_TOKENS: int = int(os.getenv("CHAT_MAX_TOTAL_TOKENS", "2000000"))
+    CHAT_SESSION_TOKEN_CAP: int = int(os.getenv("CHAT_SESSION_TOKEN_CAP", "3000"))
+    CHAT_IDLE_SECONDS: float = float(os.getenv("CHAT_IDLE_SECONDS", "1800"))
+    CHAT_WINDOW_TURNS: int = int(os.getenv("CHAT_WINDOW_TURNS", "8"))
+    CHAT_SUMMARY_TOKENS: int = int(os.getenv("CHAT_SUMMARY_TOKENS", "300"))
+    
+    # MCP tools
+    MCP_TOOL_WORKERS: int = int(os.getenv("MCP_TOOL_WORKERS", "16"))
+    MCP_TOOL_TIMEOUT_SECONDS: float = float(os.getenv("MCP_TOOL_TIMEOUT_SECONDS", "30"))
+    # Per-tool overrides, e.g. "get_doctor_report=120,schedule_appointment=60"
+    MCP_TOOL_TIMEOUTS: str = os.getenv("MCP_TOOL_TIMEOUTS", "get_doctor_report=600,get_doctor_reports_batch=600")
+    MCP_TOOL_CACHE_TTL_SECONDS: float = float(os.getenv("MCP_TOOL_CACHE_TTL_SECONDS", "60"))
+    MCP_TOOL_CACHE_MAX_SESSIONS: int = int(os.getenv("MCP_TOOL_CACHE_MAX_SESSIONS", "500"))
+    MCP_TOOL_CACHE_ENTRIES_PER_SESSION: int = int(os.getenv("MCP_TOOL_CACHE_ENTRIES_PER_SESSION", "200"))
+    # Report tools run as background jobs; short ones still answer inline
+    MCP_REPORT_WAIT_SECONDS: float = float(os.getenv("MCP_REPORT_WAIT_SECONDS", "5"))
+    MCP_REPORT_WINDOW_DAYS: int = int(os.getenv("MCP_REPORT_WINDOW_DAYS", "31"))
+    MCP_REPORT_JOB_RETENTION_SECONDS: float = float(os.getenv("MCP_REPORT_JOB_RETENTION_SECONDS", "3600"))
+    MCP_REPORT_MAX_JOBS: int = int(os.getenv("MCP_REPORT_MAX_JOBS", "1000"))
+    
+    # Assistant doctor matching
+    DOCTOR_INDEX_MAX_AGE_SECONDS: float = float(os.getenv("DOCTOR_INDEX_MAX_AGE_SECONDS", "300"))
+    
+    # Health probes
+    HEALTH_PROBE_INTERVAL_SECONDS: float = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "15"))
+    HEALTH_GEMINI_PROBE_INTERVAL_SECONDS: float = float(os.getenv("HEALTH_GEMINI_PROBE_INTERVAL_SECONDS", "300"))
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "5"))
     
     # CORS Settings
     BACKEND_CORS_ORIGINS: list = [
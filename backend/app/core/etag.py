@@ -0,0 +1,133 @@
+import hashlib
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+
+def _storage_key(key: Tuple) -> str:
+    return ":".join(str(part) for part in key)
+
+
+class VersionRegistry:
+    """Version counters for entities and collections.
+
+    Every write path bumps the counters it touches. The authoritative
+    counters live in the `entity_versions` table, so ETags built by `etag()`
+    change for every worker and pod as soon as any of them writes, and an
+    unchanged resource can be answered with 304 after a single primary-key
+    lookup instead of its full query.
+
+    `get()` reads a process-local mirror of the counters, bumped alongside
+    the stored ones and by `bump_local()` for in-process state (slot holds).
+    It does not see writes made by other processes, so in-process caches
+    compare both (see app.mcp.cache.snapshot_versions).
+    """
+
+    def __init__(self):
+        self._versions: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, *key) -> int:
+        """Get this process's version of an entity or collection"""
+        return self._versions.get(key, 0)
+
+    def bump(self, db: Session, *keys: Tuple) -> None:
+        """Increment the stored and local version of every given key.
+
+        The stored increments are staged in the caller's transaction, so they
+        commit (or roll back) together with the write they describe; call this
+        before that write's commit.
+        """
+        self.bump_local(*keys)
+        for key in keys:
+            self._bump_stored(db, _storage_key(key))
+
+    def bump_local(self, *keys: Tuple) -> None:
+        """Increment only this process's version, for changes to in-process state such as slot holds"""
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    @staticmethod
+    def _bump_stored(db: Session, key: str) -> None:
+        result = db.execute(
+            update(models.EntityVersion)
+            .where(models.EntityVersion.key == key)
+            .values(version=models.EntityVersion.version + 1)
+        )
+        if result.rowcount:
+            return
+        try:
+            with db.begin_nested():
+                db.add(models.EntityVersion(key=key, version=1))
+        except IntegrityError:
+            # Another writer created the row first
+            db.execute(
+                update(models.EntityVersion)
+                .where(models.EntityVersion.key == key)
+                .values(version=models.EntityVersion.version + 1)
+            )
+
+    def stored(self, db: Session, *keys: Tuple) -> Dict[Tuple, int]:
+        """Read the stored versions of the given keys, as written by any process"""
+        names = {_storage_key(key): key for key in keys}
+        found = dict(
+            db.query(models.EntityVersion.key, models.EntityVersion.version)
+            .filter(models.EntityVersion.key.in_(list(names)))
+            .all()
+        ) if names else {}
+        return {key: found.get(name, 0) for name, key in names.items()}
+
+    def etag(self, db: Session, *keys: Tuple, extra: str = "") -> str:
+        """Build a strong ETag from the stored versions of the given keys"""
+        stored = self.stored(db, *keys)
+        parts = [extra] + [f"{_storage_key(key)}={stored[key]}" for key in keys]
+        digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+        return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the If-None-Match header against an ETag (weak comparison, RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_response(request: Request, response: Response, etag: str,
+                         exists: Optional[Callable[[], bool]] = None) -> Optional[Response]:
+    """Return a 304 response if the client already has this version.
+
+    Otherwise the ETag is attached to the outgoing response and None is
+    returned so the endpoint can build the body as usual. `If-None-Match: *`
+    only matches a resource that exists, so endpoints for a single resource
+    pass `exists` to check that first.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    matched = etag_matches(request, etag)
+    if matched and exists is not None and request.headers.get("if-none-match", "").strip() == "*":
+        matched = exists()
+    if matched:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+
+versions = VersionRegistry()
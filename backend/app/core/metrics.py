@@ -0,0 +1,123 @@
+import bisect
+import threading
+from typing import Any, Dict, List, Tuple
+
+# Default latency buckets in seconds, from cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus style"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        result = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            result.append((str(bound), running))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class MetricsRegistry:
+    """Process-wide counters, gauges and histograms.
+
+    Kept dependency-free on purpose; the text exposition produced by
+    `render_prometheus` can be scraped from the /api/metrics endpoint.
+    """
+
+    def __init__(self):
+        self._counters: Dict[Tuple, float] = {}
+        self._gauges: Dict[Tuple, float] = {}
+        self._histograms: Dict[Tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> Tuple:
+        return (name,) + tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """Increment a counter"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge to an absolute value"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def add_gauge(self, name: str, amount: float, **labels) -> None:
+        """Move a gauge up or down"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a value (usually a latency in seconds) in a histogram"""
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def get(self, name: str, **labels) -> float:
+        """Get the current value of a counter or gauge"""
+        key = self._key(name, labels)
+        return self._counters.get(key, self._gauges.get(key, 0))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics as a JSON-friendly dictionary"""
+        def label_str(key):
+            return ",".join(f"{k}={v}" for k, v in key[1:])
+
+        with self._lock:
+            result = {"counters": {}, "gauges": {}, "histograms": {}}
+            for key, value in self._counters.items():
+                result["counters"].setdefault(key[0], {})[label_str(key)] = value
+            for key, value in self._gauges.items():
+                result["gauges"].setdefault(key[0], {})[label_str(key)] = value
+            for key, histogram in self._histograms.items():
+                result["histograms"].setdefault(key[0], {})[label_str(key)] = {
+                    "count": histogram.count,
+                    "sum": round(histogram.sum, 6),
+                    "buckets": dict(histogram.cumulative())
+                }
+            return result
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        def labels(pairs):
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for key, value in sorted(self._counters.items()):
+                lines.append(f"{key[0]}{labels(key[1:])} {value}")
+            for key, value in sorted(self._gauges.items()):
+                lines.append(f"{key[0]}{labels(key[1:])} {value}")
+            for key, histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                name, pairs = key[0], list(key[1:])
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{name}_bucket{labels(pairs + [('le', bound)])} {count}")
+                lines.append(f"{name}_sum{labels(pairs)} {histogram.sum}")
+                lines.append(f"{name}_count{labels(pairs)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,61 @@
+import os
+import threading
+from typing import Any, Dict, Iterable, List
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+
+from app.core.config import settings
+
+
+def format_datetime(value, fmt: str = "%Y-%m-%d %H:%M") -> str:
+    return value.strftime(fmt) if value else ""
+
+
+class TemplateRegistry:
+    """Jinja2 templates for emails, Slack messages and LLM prompts.
+
+    Templates live in app/templates (or TEMPLATE_DIR). `load_all()` compiles
+    every template once at startup and the files are never checked again,
+    so rendering only runs the compiled template. HTML templates are
+    autoescaped; text templates (Slack messages, prompts) are rendered as is.
+    """
+
+    def __init__(self, template_dir: str):
+        self.template_dir = template_dir
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(["html", "xml"]),
+            auto_reload=False,
+            cache_size=-1,
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+        self.env.filters["datetime"] = format_datetime
+        self._templates: Dict[str, Template] = {}
+        self._lock = threading.Lock()
+
+    def load_all(self) -> int:
+        """Compile every template up front; returns how many were loaded"""
+        for name in self.env.list_templates():
+            self.get(name)
+        return len(self._templates)
+
+    def get(self, name: str) -> Template:
+        template = self._templates.get(name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(name)
+                if template is None:
+                    template = self._templates[name] = self.env.get_template(name)
+        return template
+
+    def render(self, template_name: str, **context: Any) -> str:
+        return self.get(template_name).render(**context).strip()
+
+    def render_many(self, template_name: str, contexts: Iterable[Dict[str, Any]]) -> List[str]:
+        """Render one template for many contexts, e.g. for bulk sends"""
+        template = self.get(template_name)
+        return [template.render(**context).strip() for context in contexts]
+
+
+templates = TemplateRegistry(settings.TEMPLATE_DIR)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Enum
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime
@@ -14,6 +14,11 @@ class AppointmentStatus(str, enum.Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+class EmailStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
 class User(Base):
     __tablename__ = "users"
 
@@ -83,7 +88,55 @@ class Appointment(Base):
     diagnosis = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     calendar_event_id = Column(String, nullable=True)  # Google Calendar Event ID
+    summary = Column(Text, nullable=True)  # LLM-generated visit summary
+    summary_generated_at = Column(DateTime, nullable=True)
+    reminder_sent_at = Column(DateTime, nullable=True)  # Set by the next-day reminder job
+    # PostgreSQL also has a generated time_range column with a non-overlap
+    # exclusion constraint (migration 004); see app/db/overlap.py
+    
+    __table_args__ = (
+        Index("ix_appointments_doctor_time", "doctor_id", "appointment_time", "end_time"),
+        Index("ix_appointments_time_status", "appointment_time", "status"),
+    )
     
     # Relationships
     doctor = relationship("Doctor", back_populates="appointments")
-    patient = relationship("Patient", back_populates="appointments")
\ No newline at end of file
+    patient = relationship("Patient", back_populates="appointments")
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)  # "<scope>:<client key>"
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is still running
+    response = Column(Text, nullable=True)  # JSON body replayed to retries
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class OutboxEmail(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    # Stored by value to match the lowercase `emailstatus` type of the migration
+    status = Column(
+        Enum(EmailStatus, values_callable=lambda e: [m.value for m in e], name="emailstatus"),
+        default=EmailStatus.PENDING, nullable=False
+    )
+    attempts = Column(Integer, default=0, nullable=False)
+    # Due time for pending emails; pushed forward while a worker holds the email and on retries
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+class EntityVersion(Base):
+    __tablename__ = "entity_versions"
+
+    key = Column(String, primary_key=True)  # e.g. "doctor:42" or "patients"
+    version = Column(Integer, nullable=False, default=0)
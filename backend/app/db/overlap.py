@@ -0,0 +1,123 @@
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+# SQLSTATE of exclusion constraint violations
+EXCLUSION_VIOLATION = "23P01"
+
+# Appointment fields whose change can make it overlap another appointment
+SLOT_FIELDS = ("doctor_id", "appointment_time", "end_time", "status")
+
+
+class AppointmentOverlapError(Exception):
+    """The appointment overlaps another non-cancelled appointment of the same doctor"""
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def overlapping_appointments(db: Session, doctor_id: int, start: datetime, end: datetime):
+    """Query for the doctor's non-cancelled appointments that overlap [start, end)"""
+    query = db.query(models.Appointment).filter(
+        models.Appointment.doctor_id == doctor_id,
+        models.Appointment.status != models.AppointmentStatus.CANCELLED
+    )
+    if _is_postgres(db):
+        # Served by the GiST index of the appointments_no_overlap constraint
+        return query.filter(
+            text("appointments.time_range && tsrange(:overlap_start, :overlap_end, '[)')")
+        ).params(overlap_start=start, overlap_end=end)
+    # Served by ix_appointments_doctor_time
+    return query.filter(
+        models.Appointment.appointment_time < end,
+        models.Appointment.end_time > start
+    )
+
+
+def find_overlapping_appointment(db: Session, doctor_id: int, start: datetime,
+                                 end: datetime) -> Optional[models.Appointment]:
+    return overlapping_appointments(db, doctor_id, start, end).first()
+
+
+_doctor_locks: Dict[int, threading.Lock] = {}
+_doctor_locks_lock = threading.Lock()
+
+
+def _doctor_lock(doctor_id: int) -> threading.Lock:
+    with _doctor_locks_lock:
+        return _doctor_locks.setdefault(doctor_id, threading.Lock())
+
+
+def _commit(db: Session) -> None:
+    """Commit, turning a violation of the PostgreSQL exclusion constraint into AppointmentOverlapError"""
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if getattr(e.orig, "pgcode", None) == EXCLUSION_VIOLATION:
+            raise AppointmentOverlapError("The doctor already has an appointment at this time")
+        raise
+
+
+def insert_appointment(db: Session, appointment: models.Appointment) -> models.Appointment:
+    """Insert and commit an appointment, raising AppointmentOverlapError on a double booking.
+
+    Changes already staged in the session (e.g. version bumps) commit with
+    the insert, or are rolled back with it.
+
+    On PostgreSQL the exclusion constraint decides, so concurrent inserts
+    need no locking here. Other databases have no such constraint, so the
+    overlap check and the insert run under a per-doctor lock (which only
+    covers this process).
+    """
+    if _is_postgres(db):
+        db.add(appointment)
+        _commit(db)
+        db.refresh(appointment)
+        return appointment
+
+    with _doctor_lock(appointment.doctor_id):
+        if find_overlapping_appointment(db, appointment.doctor_id, appointment.appointment_time, appointment.end_time):
+            db.rollback()
+            raise AppointmentOverlapError("The doctor already has an appointment at this time")
+        db.add(appointment)
+        db.commit()
+    db.refresh(appointment)
+    return appointment
+
+
+def apply_appointment_update(db: Session, appointment: models.Appointment, changes: Dict[str, Any]) -> models.Appointment:
+    """Apply changes to an appointment and commit them, with the same double booking rules as insert_appointment.
+
+    Only changes to the doctor, the times or the status (reactivating a
+    cancelled appointment) can create an overlap; other updates are
+    committed without a check.
+    """
+    if _is_postgres(db) or not any(field in changes for field in SLOT_FIELDS):
+        for key, value in changes.items():
+            setattr(appointment, key, value)
+        _commit(db)
+        db.refresh(appointment)
+        return appointment
+
+    doctor_id = changes.get("doctor_id", appointment.doctor_id)
+    start = changes.get("appointment_time", appointment.appointment_time)
+    end = changes.get("end_time", appointment.end_time)
+    status = changes.get("status", appointment.status)
+    with _doctor_lock(doctor_id):
+        if status != models.AppointmentStatus.CANCELLED and overlapping_appointments(db, doctor_id, start, end)\
+                .filter(models.Appointment.id != appointment.id).first():
+            db.rollback()
+            raise AppointmentOverlapError("The doctor already has an appointment at this time")
+        for key, value in changes.items():
+            setattr(appointment, key, value)
+        db.commit()
+    db.refresh(appointment)
+    return appointment
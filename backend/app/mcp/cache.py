@@ -0,0 +1,152 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.etag import versions
+from app.core.metrics import metrics
+from app.db.database import SessionLocal
+
+
+def get_mcp_session_id(request: Request) -> Optional[str]:
+    """Agent session of a tool call, from the MCP session header; None without one"""
+    return request.headers.get("mcp-session-id")
+
+
+def snapshot_versions(db: Session, doctor_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+    """(stored, process-local) appointment version of each doctor.
+
+    The stored version changes on writes from any worker; the local one
+    also on slot holds, which only live in this process.
+    """
+    keys = [("doctor_appointments", doctor_id) for doctor_id in doctor_ids]
+    stored = versions.stored(db, *keys)
+    return {key[1]: (stored[key], versions.get(*key)) for key in keys}
+
+
+async def load_doctor_versions(doctor_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+    """snapshot_versions with its own session, off the event loop"""
+    doctor_ids = list(doctor_ids)
+    if not doctor_ids:
+        return {}
+
+    def load():
+        db = SessionLocal()
+        try:
+            return snapshot_versions(db, doctor_ids)
+        finally:
+            db.close()
+    return await asyncio.to_thread(load)
+
+
+def doctor_ids_in(*values: Any) -> set:
+    """Collect doctor IDs from tool arguments and results"""
+    found = set()
+    for value in values:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key == "doctor_id" and isinstance(item, int):
+                    found.add(item)
+                elif key == "doctor_ids" and isinstance(item, list):
+                    found.update(i for i in item if isinstance(i, int))
+                elif isinstance(item, (dict, list)):
+                    found |= doctor_ids_in(item)
+        elif isinstance(value, list):
+            for item in value:
+                found |= doctor_ids_in(item)
+    return found
+
+
+class ToolResultCache:
+    """Results of read-only MCP tools, scoped to an agent session.
+
+    Entries are keyed by tool name and arguments, and remember the
+    ("doctor_appointments", doctor_id) versions of every doctor involved
+    (see snapshot_versions). Every write path already bumps those versions,
+    so a booking for a doctor, in any worker, makes that doctor's cached
+    availability and reports miss on the next read, in every session.
+
+    Calls without a session (no mcp-session-id header) are never cached,
+    since unrelated clients would otherwise share one session.
+
+    Cached results are shared; callers must not mutate them.
+    """
+
+    def __init__(self, ttl_seconds: float, max_sessions: int, max_entries_per_session: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_entries_per_session = max_entries_per_session
+        self._sessions: "OrderedDict[str, OrderedDict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(tool_name: str, args: Dict[str, Any]) -> str:
+        return tool_name + ":" + json.dumps(args, sort_keys=True, default=str)
+
+    async def get(self, session_id: Optional[str], tool_name: str, args: Dict[str, Any]) -> Optional[Any]:
+        if session_id is None:
+            metrics.inc("mcp_tool_cache_total", tool=tool_name, result="bypass")
+            return None
+        key = self.make_key(tool_name, args)
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            entry = entries.get(key) if entries is not None else None
+            if entry is not None and time.monotonic() > entry[0]:
+                del entries[key]
+                metrics.inc("mcp_tool_cache_total", tool=tool_name, result="expired")
+                return None
+        if entry is None:
+            metrics.inc("mcp_tool_cache_total", tool=tool_name, result="miss")
+            return None
+
+        _, doctor_versions, result = entry
+        if await load_doctor_versions(doctor_versions) != doctor_versions:
+            with self._lock:
+                if entries.get(key) is entry:
+                    del entries[key]
+            metrics.inc("mcp_tool_cache_total", tool=tool_name, result="stale")
+            return None
+
+        with self._lock:
+            if key in entries:
+                entries.move_to_end(key)
+            if session_id in self._sessions:
+                self._sessions.move_to_end(session_id)
+        metrics.inc("mcp_tool_cache_total", tool=tool_name, result="hit")
+        return result
+
+    def set(self, session_id: Optional[str], tool_name: str, args: Dict[str, Any], result: Any,
+            doctor_versions: Dict[int, Tuple[int, int]]) -> None:
+        """Store a result; doctor_versions should be taken before the tool ran"""
+        if session_id is None:
+            return
+        key = self.make_key(tool_name, args)
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            if entries is None:
+                entries = self._sessions[session_id] = OrderedDict()
+            entries[key] = (time.monotonic() + self.ttl_seconds, doctor_versions, result)
+            entries.move_to_end(key)
+            self._sessions.move_to_end(session_id)
+
+            while len(entries) > self.max_entries_per_session:
+                entries.popitem(last=False)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def drop_session(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+tool_cache = ToolResultCache(
+    ttl_seconds=settings.MCP_TOOL_CACHE_TTL_SECONDS,
+    max_sessions=settings.MCP_TOOL_CACHE_MAX_SESSIONS,
+    max_entries_per_session=settings.MCP_TOOL_CACHE_ENTRIES_PER_SESSION
+)
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class ToolTimeoutError(Exception):
+    """Raised when a tool does not finish within its timeout"""
+
+    def __init__(self, tool_name: str, timeout: float):
+        super().__init__(f"{tool_name} timed out after {timeout}s")
+        self.tool_name = tool_name
+        self.timeout = timeout
+
+
+class ToolExecutor:
+    """Runs blocking MCP tool bodies (SQLAlchemy, Google Calendar, SMTP) in worker threads.
+
+    Tools get their own pool so a burst of slow tool calls cannot starve the
+    default executor used by the rest of the app. Every call is counted and
+    timed per tool as `mcp_tool_calls_total{tool,outcome}` and
+    `mcp_tool_seconds{tool}`.
+
+    A timed out call returns control to the agent right away, but its thread
+    keeps running until the blocking call itself returns. Tool bodies must
+    therefore open their own database session (see
+    MCPAppointmentServer.with_session) rather than use the request's, and
+    write tools answer a timeout with `in_progress_result` since their
+    change may still be committed.
+    """
+
+    def __init__(self, max_workers: int, default_timeout: float, timeouts: Optional[Dict[str, float]] = None):
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-tool")
+
+    def timeout_for(self, tool_name: str) -> float:
+        return self.timeouts.get(tool_name, self.default_timeout)
+
+    async def run(self, tool_name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) in the pool, enforcing the tool's timeout"""
+        timeout = self.timeout_for(tool_name)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        outcome = "error"
+        metrics.add_gauge("mcp_tool_in_flight", 1, tool=tool_name)
+        try:
+            future = loop.run_in_executor(self._pool, lambda: fn(*args, **kwargs))
+            result = await asyncio.wait_for(future, timeout)
+            outcome = "success"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise ToolTimeoutError(tool_name, timeout)
+        finally:
+            metrics.add_gauge("mcp_tool_in_flight", -1, tool=tool_name)
+            metrics.inc("mcp_tool_calls_total", tool=tool_name, outcome=outcome)
+            metrics.observe("mcp_tool_seconds", time.perf_counter() - started, tool=tool_name)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def in_progress_result(error: ToolTimeoutError, check: str) -> Dict[str, Any]:
+    """Result for a write tool that timed out but may still complete in the background"""
+    return {
+        "success": None,
+        "status": "in_progress",
+        "message": f"{error}, but the operation is still running and may still succeed. "
+                   f"Do not retry blindly; {check}"
+    }
+
+
+def parse_tool_timeouts(value: str) -> Dict[str, float]:
+    """Parse "tool=seconds,tool=seconds" into a dictionary"""
+    timeouts = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, seconds = item.split("=", 1)
+            timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+tool_executor = ToolExecutor(
+    max_workers=settings.MCP_TOOL_WORKERS,
+    default_timeout=settings.MCP_TOOL_TIMEOUT_SECONDS,
+    timeouts=parse_tool_timeouts(settings.MCP_TOOL_TIMEOUTS)
+)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.mcp.cache import load_doctor_versions
+from app.mcp.executor import ToolExecutor, tool_executor
+
+
+class ReportJob:
+    """A long-running tool call executing in the background"""
+
+    def __init__(self, tool_name: str, args: Dict[str, Any], session_id: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.tool_name = tool_name
+        self.args = args
+        # Sessions that asked for this job; all of them get its notifications
+        self.session_ids: List[str] = [session_id] if session_id is not None else []
+        self.status = "pending"
+        self.done = 0
+        self.total = 0
+        self.partial_results: List[Any] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "tool": self.tool_name,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+        }
+        if self.partial_results and not self.finished:
+            data["partial_results"] = self.partial_results
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class ReportJobManager:
+    """Runs report tools as background jobs in the MCP tool executor.
+
+    The job body gets a `progress(done, total, partial=None)` callback it
+    can call from its worker thread; every call updates the job and sends
+    an MCP progress notification to the sessions following it.
+
+    Identical calls (same tool, arguments and appointment versions of the
+    doctors involved, as stored in the database) share one job, so a client that times out and retries
+    gets the running or finished job back instead of starting the work again.
+    The key deliberately leaves the session out: a session that joins an
+    existing job is added to its followers and gets the notifications from
+    then on (earlier partial results are in the job status). Finished jobs
+    are kept for `retention_seconds`; failed ones, including reports that
+    returned `success: False`, are run again by the next identical call.
+    """
+
+    def __init__(self, executor: ToolExecutor, retention_seconds: float, max_jobs: int):
+        self.executor = executor
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._by_key: Dict[str, str] = {}
+
+    @staticmethod
+    async def _dedupe_key(tool_name: str, args: Dict[str, Any], doctor_ids: Iterable[int]) -> str:
+        doctor_versions = await load_doctor_versions(doctor_ids)
+        return json.dumps([tool_name, args, doctor_versions], sort_keys=True, default=str)
+
+    async def submit(self, session_id: Optional[str], tool_name: str, args: Dict[str, Any],
+               fn: Callable[[Callable], Dict[str, Any]], doctor_ids: Iterable[int],
+               notify: Callable[[ReportJob, Any], Awaitable[None]]) -> ReportJob:
+        """Start a job for fn(progress), or return the existing job for the same call"""
+        key = await self._dedupe_key(tool_name, args, doctor_ids)
+        self._prune()
+        existing = self._jobs.get(self._by_key.get(key, ""))
+        if existing is not None and existing.status != "failed":
+            if session_id is not None and session_id not in existing.session_ids:
+                existing.session_ids.append(session_id)
+            metrics.inc("mcp_report_jobs_total", tool=tool_name, outcome="deduplicated")
+            return existing
+
+        job = ReportJob(tool_name, args, session_id)
+        self._jobs[job.id] = job
+        self._by_key[key] = job.id
+        job.task = asyncio.create_task(self._run(job, fn, notify))
+        return job
+
+    async def _run(self, job: ReportJob, fn: Callable, notify: Callable) -> None:
+        loop = asyncio.get_running_loop()
+
+        def progress(done: int, total: int, partial: Any = None) -> None:
+            # Called from the worker thread
+            def update():
+                job.done, job.total = done, total
+                if partial is not None:
+                    job.partial_results.append(partial)
+                asyncio.ensure_future(notify(job, partial))
+            loop.call_soon_threadsafe(update)
+
+        job.status = "running"
+        try:
+            job.result = await self.executor.run(job.tool_name, fn, progress)
+            if isinstance(job.result, dict) and job.result.get("success") is False:
+                # Report functions return their errors (e.g. a lost database
+                # connection); don't serve them to retries
+                job.status = "failed"
+                job.error = job.result.get("message")
+            else:
+                job.status = "completed"
+                job.partial_results = []
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = time.time()
+        metrics.inc("mcp_report_jobs_total", tool=job.tool_name, outcome=job.status)
+        await notify(job, None)
+
+    async def wait(self, job: ReportJob, timeout: float) -> Dict[str, Any]:
+        """Wait up to timeout for a job; return its result if done, else its status"""
+        if not job.finished and timeout > 0:
+            try:
+                await asyncio.wait_for(asyncio.shield(job.task), timeout)
+            except asyncio.TimeoutError:
+                pass
+        if job.status == "completed":
+            return job.result
+        return job.to_dict()
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            too_many = len(self._jobs) > self.max_jobs
+            expired = job.finished and now - job.finished_at > self.retention_seconds
+            if expired or (too_many and job.finished):
+                del self._jobs[job_id]
+        live = set(self._jobs)
+        self._by_key = {key: job_id for key, job_id in self._by_key.items() if job_id in live}
+
+
+report_jobs = ReportJobManager(
+    executor=tool_executor,
+    retention_seconds=settings.MCP_REPORT_JOB_RETENTION_SECONDS,
+    max_jobs=settings.MCP_REPORT_MAX_JOBS
+)
@@ -5,13 +5,30 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import json
 
-from app.db.database import get_db
+from app.db.database import SessionLocal
 from app.services.appointment_service import AppointmentService
 from app.services.calendar_service import CalendarService
 from app.services.email_service import EmailService
+from app.services.booking_context import BookingContext
 from app.services.notification_service import NotificationService
 from app.schemas.appointment import DoctorAvailability, AvailabilitySlot, AppointmentCreate
-from app.schemas.report import ReportRequest, DoctorReport
+from app.schemas.report import ReportRequest, DoctorReport, AppointmentStats, PatientCondition
+from app.core.config import settings
+from app.core.etag import versions
+from app.db import models
+from app.db.overlap import insert_appointment
+from app.services.slot_hold_service import slot_holds
+from app.services.idempotency_service import (
+    idempotency_service, IdempotencyConflictError, IdempotencyInProgressError
+)
+from app.mcp.executor import tool_executor, ToolTimeoutError, in_progress_result
+from app.mcp.cache import tool_cache, get_mcp_session_id, doctor_ids_in, load_doctor_versions
+from app.mcp.jobs import report_jobs, ReportJob
+from app.mcp.prompts import register_appointment_prompts
+from app.mcp.tools import (
+    register_availability_tools, register_appointment_tools,
+    register_calendar_tools, register_report_tools
+)
 
 class MCPAppointmentServer:
     def __init__(self, app: FastAPI):
@@ -21,6 +38,16 @@ class MCPAppointmentServer:
         self.email_service = EmailService()
         self.notification_service = NotificationService()
         
+        # Tool bodies call blocking services, so they run in a dedicated pool
+        self.tool_executor = tool_executor
+        app.add_event_handler("shutdown", self.tool_executor.shutdown)
+        
+        # Session-scoped results of read-only tools
+        self.tool_cache = tool_cache
+        
+        # Report tools run as background jobs with progress notifications
+        self.report_jobs = report_jobs
+        
         # Set up MCP host and server
         self.mcp_host = MCPHost()
         self.mcp_server = MCPServer(
@@ -30,8 +57,63 @@ class MCPAppointmentServer:
             description="MCP server for doctor appointments and reporting"
         )
         
-        # Register tools
+        # Register tools and prompts
         self.register_tools()
+        register_appointment_prompts(self)
+    
+    async def run_read_tool(self, session_id: Optional[str], tool_name: str, args: Dict[str, Any],
+                            fn, *fn_args) -> Dict[str, Any]:
+        """Run a read-only tool through the executor, serving repeated calls from the session cache"""
+        if session_id is None:
+            # Not cached without a session
+            return await self.tool_executor.run(tool_name, fn, *fn_args)
+        cached = await self.tool_cache.get(session_id, tool_name, args)
+        if cached is not None:
+            return cached
+        
+        # Versions are taken before the call, so a booking made meanwhile invalidates the result
+        doctor_versions = await load_doctor_versions(doctor_ids_in(args))
+        result = await self.tool_executor.run(tool_name, fn, *fn_args)
+        
+        if result.get("error") or result.get("success") is False:
+            return result
+        doctor_ids = doctor_ids_in(args, result)
+        if not doctor_ids:
+            # Nothing to invalidate it by
+            return result
+        # Doctors only known from the result, e.g. availability looked up by name
+        doctor_versions.update(await load_doctor_versions(doctor_ids - doctor_versions.keys()))
+        self.tool_cache.set(session_id, tool_name, args, result, doctor_versions)
+        return result
+    
+    def with_session(self, fn, *args):
+        """Run fn(db, *args) with its own session.
+
+        Tool bodies and background jobs can outlive the request (a timed out
+        tool keeps running in its thread), so they never use the request's session.
+        """
+        db = SessionLocal()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+    
+    async def notify_job_progress(self, job: ReportJob, partial: Any) -> None:
+        """Send an MCP progress notification for a job to every session following it"""
+        params = {
+            "progressToken": job.id,
+            "progress": job.done,
+            "total": job.total,
+            "message": f"{job.tool_name} {job.status}"
+        }
+        if partial is not None:
+            params["partial_result"] = partial
+        # Calls without a session have nobody to notify; get_report_job still works for them
+        for session_id in list(job.session_ids):
+            try:
+                await self.mcp_server.send_notification(session_id, "notifications/progress", params)
+            except Exception as e:
+                print(f"Error sending progress notification for job {job.id}: {e}")
     
     def register_tools(self):
         # Register all tools with the MCP server
@@ -41,7 +123,7 @@ class MCPAppointmentServer:
             doctor_name: str,
             date: Optional[str] = None,
             time_of_day: Optional[str] = None,
-            db: Session = Depends(get_db)
+            session_id: Optional[str] = Depends(get_mcp_session_id)
         ) -> Dict[str, Any]:
             """
             Check a doctor's availability for a specific date and time of day.
@@ -55,26 +137,12 @@ class MCPAppointmentServer:
                 Availability information with possible slots
             """
             try:
-                results = self.appointment_service.check_doctor_availability(
-                    db, doctor_name, date, time_of_day
+                return await self.run_read_tool(
+                    session_id, "check_doctor_availability",
+                    {"doctor_name": doctor_name, "date": date, "time_of_day": time_of_day},
+                    self.with_session, self._check_doctor_availability, doctor_name, date, time_of_day
                 )
-                
-                available_slots = []
-                for result in results:
-                    for slot in result.available_slots:
-                        available_slots.append({
-                            "start_time": slot.start_time.isoformat(),
-                            "end_time": slot.end_time.isoformat()
-                        })
-                
-                return {
-                    "doctor_id": results[0].doctor_id if results else None,
-                    "doctor_name": doctor_name,
-                    "has_availability": len(available_slots) > 0,
-                    "available_slots": available_slots,
-                    "message": f"Found {len(available_slots)} available slots"
-                }
-            except Exception as e:
+            except ToolTimeoutError as e:
                 return {
                     "error": str(e),
                     "doctor_name": doctor_name,
@@ -91,7 +159,8 @@ class MCPAppointmentServer:
             duration_minutes: int = 30,
             reason: Optional[str] = None,
             symptoms: Optional[str] = None,
-            db: Session = Depends(get_db)
+            hold_id: Optional[str] = None,
+            idempotency_key: Optional[str] = None
         ) -> Dict[str, Any]:
             """
             Schedule an appointment with a doctor.
@@ -103,58 +172,25 @@ class MCPAppointmentServer:
                 duration_minutes: Duration of appointment in minutes
                 reason: Reason for the appointment
                 symptoms: Patient's symptoms
+                hold_id: ID returned by hold_slot, if the slot was held first
+                idempotency_key: Unique key for this booking; retries with the same key
+                    return the original result instead of booking again
                 
             Returns:
                 Appointment details
             """
             try:
-                start_time = datetime.fromisoformat(appointment_time)
-                end_time = start_time + timedelta(minutes=duration_minutes)
-                
-                appointment_data = AppointmentCreate(
-                    doctor_id=doctor_id,
-                    patient_id=patient_id,
-                    appointment_time=start_time,
-                    end_time=end_time,
-                    reason=reason,
-                    symptoms=symptoms
+                return await self.tool_executor.run(
+                    "schedule_appointment", self.with_session, self._schedule_appointment,
+                    doctor_id, patient_id, appointment_time, duration_minutes, reason, symptoms,
+                    hold_id, idempotency_key
                 )
-                
-                # Create appointment and add to calendar
-                appointment = self.appointment_service.create_appointment(db, appointment_data)
-                
-                # Add to Google Calendar
-                calendar_event_id = self.calendar_service.create_calendar_event(
-                    db, appointment.id, doctor_id, patient_id, start_time, end_time, reason
+            except ToolTimeoutError as e:
+                # The booking may still be committed by the worker thread
+                return in_progress_result(
+                    e, "call schedule_appointment again with the same idempotency_key to get its outcome"
+                    if idempotency_key else "check the patient's appointments before booking again"
                 )
-                
-                # Update appointment with calendar event ID
-                if calendar_event_id:
-                    self.appointment_service.update_appointment_calendar_id(
-                        db, appointment.id, calendar_event_id
-                    )
-                
-                # Send email confirmation
-                self.email_service.send_appointment_confirmation(
-                    db, appointment.id, doctor_id, patient_id
-                )
-                
-                return {
-                    "appointment_id": appointment.id,
-                    "doctor_id": doctor_id,
-                    "patient_id": patient_id,
-                    "appointment_time": start_time.isoformat(),
-                    "end_time": end_time.isoformat(),
-                    "status": appointment.status,
-                    "calendar_event_id": calendar_event_id,
-                    "success": True,
-                    "message": "Appointment scheduled successfully"
-                }
-            except Exception as e:
-                return {
-                    "success": False,
-                    "message": f"Failed to schedule appointment: {str(e)}"
-                }
 
         @self.mcp_server.tool("get_doctor_report")
         async def get_doctor_report(
@@ -162,11 +198,17 @@ class MCPAppointmentServer:
             date_from: Optional[str] = None,
             date_to: Optional[str] = None,
             condition: Optional[str] = None,
-            db: Session = Depends(get_db)
+            session_id: Optional[str] = Depends(get_mcp_session_id)
         ) -> Dict[str, Any]:
             """
             Get a summary report for a doctor's appointments.
             
+            Long date ranges are processed in the background, period by period.
+            If the report is not ready within a few seconds, the job status is
+            returned instead; progress notifications with partial results are
+            sent meanwhile and get_report_job returns the final report.
+            Calling again with the same arguments returns the same job.
+            
             Args:
                 doctor_id: ID of the doctor
                 date_from: Optional start date in YYYY-MM-DD format or natural language
@@ -174,53 +216,299 @@ class MCPAppointmentServer:
                 condition: Optional medical condition to filter by
                 
             Returns:
-                Doctor report summary
+                Doctor report summary, or the status of the job computing it
             """
+            job = await self.report_jobs.submit(
+                session_id, "get_doctor_report",
+                {"doctor_id": doctor_id, "date_from": date_from, "date_to": date_to, "condition": condition},
+                lambda progress: self.with_session(
+                    self._get_doctor_report, doctor_id, date_from, date_to, condition, progress
+                ),
+                [doctor_id], self.notify_job_progress
+            )
+            return await self.report_jobs.wait(job, settings.MCP_REPORT_WAIT_SECONDS)
+
+        @self.mcp_server.tool("get_report_job")
+        async def get_report_job(job_id: str, wait_seconds: float = 0) -> Dict[str, Any]:
+            """
+            Get the status, partial results or final result of a report job.
+            
+            Args:
+                job_id: ID returned by a report tool
+                wait_seconds: Wait up to this long (at most 30 seconds) for the job to finish
+                
+            Returns:
+                Job status with progress, and the result once completed
+            """
+            job = self.report_jobs.get(job_id)
+            if job is None:
+                return {"success": False, "message": "Report job not found or expired"}
+            await self.report_jobs.wait(job, min(wait_seconds, 30))
+            return job.to_dict()
+
+        # Batched variants, so agents need fewer turns per conversation
+        register_availability_tools(self)
+        register_appointment_tools(self)
+        register_calendar_tools(self)
+        register_report_tools(self)
+
+    # Synchronous tool bodies, run in worker threads by the tools above
+
+    def _check_doctor_availability(self, db: Session, doctor_name: str, date: Optional[str],
+                                   time_of_day: Optional[str]) -> Dict[str, Any]:
+        try:
+            results = self.appointment_service.check_doctor_availability(
+                db, doctor_name, date, time_of_day
+            )
+            
+            available_slots = []
+            for result in results:
+                for slot in result.available_slots:
+                    available_slots.append({
+                        "start_time": slot.start_time.isoformat(),
+                        "end_time": slot.end_time.isoformat()
+                    })
+            
+            return {
+                "doctor_id": results[0].doctor_id if results else None,
+                "doctor_name": doctor_name,
+                "has_availability": len(available_slots) > 0,
+                "available_slots": available_slots,
+                "message": f"Found {len(available_slots)} available slots"
+            }
+        except Exception as e:
+            return {
+                "error": str(e),
+                "doctor_name": doctor_name,
+                "has_availability": False,
+                "available_slots": [],
+                "message": f"Error checking availability: {str(e)}"
+            }
+
+    def _schedule_appointment(self, db: Session, doctor_id: int, patient_id: int, appointment_time: str,
+                              duration_minutes: int, reason: Optional[str], symptoms: Optional[str],
+                              hold_id: Optional[str] = None,
+                              idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        args = (doctor_id, patient_id, appointment_time, duration_minutes, reason, symptoms, hold_id)
+        if not idempotency_key:
+            return self._schedule_appointment_once(db, *args)
+        
+        scope = "mcp:schedule_appointment"
+        request_hash = idempotency_service.request_hash({"args": args})
+        try:
+            replay = idempotency_service.begin(db, scope, idempotency_key, request_hash)
+        except (IdempotencyConflictError, IdempotencyInProgressError) as e:
+            return {
+                "success": False,
+                "message": f"Failed to schedule appointment: {str(e)}"
+            }
+        if replay is not None:
+            return {**replay[1], "replayed": True}
+        
+        booked = []
+        
+        def complete_key(result: Dict[str, Any]) -> None:
+            booked.append(result)
+            idempotency_service.complete(db, scope, idempotency_key, request_hash, 200, result)
+        
+        # The key is completed as soon as the appointment row exists, so a
+        # retry after a failed calendar or email step gets the booking back
+        result = self._schedule_appointment_once(db, *args, on_inserted=complete_key)
+        if result.get("success"):
+            complete_key(result)
+        elif not booked:
+            idempotency_service.abandon(db, scope, idempotency_key)
+        return result
+
+    def _schedule_appointment_once(self, db: Session, doctor_id: int, patient_id: int, appointment_time: str,
+                                   duration_minutes: int, reason: Optional[str], symptoms: Optional[str],
+                                   hold_id: Optional[str], on_inserted=None) -> Dict[str, Any]:
+        try:
+            start_time = datetime.fromisoformat(appointment_time)
+            end_time = start_time + timedelta(minutes=duration_minutes)
+            
+            if hold_id:
+                with slot_holds.confirming(hold_id) as hold:
+                    if (hold.doctor_id, hold.patient_id) != (doctor_id, patient_id) \
+                            or start_time < hold.start or end_time > hold.end:
+                        raise ValueError("The slot hold is for a different doctor, patient or time")
+                    return self._book_appointment(
+                        db, doctor_id, patient_id, start_time, end_time, reason, symptoms, on_inserted
+                    )
+            
+            # Don't take a slot that another booking flow is holding
+            slot_holds.check_free(doctor_id, start_time, end_time, patient_id)
+            return self._book_appointment(
+                db, doctor_id, patient_id, start_time, end_time, reason, symptoms, on_inserted
+            )
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Failed to schedule appointment: {str(e)}"
+            }
+
+    def _book_appointment(self, db: Session, doctor_id: int, patient_id: int, start_time: datetime,
+                          end_time: datetime, reason: Optional[str], symptoms: Optional[str],
+                          on_inserted=None) -> Dict[str, Any]:
+        """Book and confirm an appointment; `on_inserted(result)` is called once its row is committed"""
+        appointment_data = AppointmentCreate(
+            doctor_id=doctor_id,
+            patient_id=patient_id,
+            appointment_time=start_time,
+            end_time=end_time,
+            reason=reason,
+            symptoms=symptoms
+        )
+        
+        # Create appointment and add to calendar; overlaps are rejected by the database.
+        # Versions are staged first so they commit with the insert
+        versions.bump(
+            db,
+            ("doctor_appointments", doctor_id),
+            ("patient_appointments", patient_id)
+        )
+        appointment = insert_appointment(db, models.Appointment(**appointment_data.dict()))
+        if on_inserted:
+            on_inserted(self._booking_result(appointment, None))
+        
+        # Doctor and patient rows are loaded once for the calendar and email steps
+        context = BookingContext.load(db, appointment)
+        
+        # Add to Google Calendar
+        calendar_event_id = self.calendar_service.create_booking_event(context) if context else None
+        
+        # Save the calendar event ID before the email, so a failed enqueue can't lose it
+        if calendar_event_id:
+            appointment.calendar_event_id = calendar_event_id
+            db.commit()
+        
+        # Send email confirmation; the booking stands even if it can't be queued
+        if context:
             try:
-                # Create report request
+                self.email_service.send_booking_confirmation(db, context)
+            except Exception as e:
+                print(f"Error queueing confirmation for appointment {appointment.id}: {e}")
+        
+        return self._booking_result(appointment, calendar_event_id)
+
+    @staticmethod
+    def _booking_result(appointment: models.Appointment, calendar_event_id: Optional[str]) -> Dict[str, Any]:
+        return {
+            "appointment_id": appointment.id,
+            "doctor_id": appointment.doctor_id,
+            "patient_id": appointment.patient_id,
+            "appointment_time": appointment.appointment_time.isoformat(),
+            "end_time": appointment.end_time.isoformat(),
+            "status": appointment.status,
+            "calendar_event_id": calendar_event_id,
+            "success": True,
+            "message": "Appointment scheduled successfully"
+        }
+
+    def _get_doctor_report(self, db: Session, doctor_id: int, date_from: Optional[str],
+                           date_to: Optional[str], condition: Optional[str], progress=None) -> Dict[str, Any]:
+        try:
+            windows = self._report_windows(
+                datetime.fromisoformat(date_from).date() if date_from else None,
+                datetime.fromisoformat(date_to).date() if date_to else None
+            )
+            
+            # Generate the report period by period, so progress can be reported
+            reports = []
+            for index, (window_from, window_to) in enumerate(windows):
                 request = ReportRequest(
                     doctor_id=doctor_id,
-                    date_from=datetime.fromisoformat(date_from).date() if date_from else None,
-                    date_to=datetime.fromisoformat(date_to).date() if date_to else None,
+                    date_from=window_from,
+                    date_to=window_to,
                     condition=condition
                 )
-                
-                # Generate report
                 report = self.appointment_service.generate_doctor_report(db, request)
-                
-                # Send notification
-                self.notification_service.send_report_notification(db, doctor_id, report)
-                
-                result = {
-                    "doctor_id": report.doctor_id,
-                    "doctor_name": report.doctor_name,
-                    "report_date": report.report_date.isoformat(),
-                    "appointment_stats": {
-                        "total": report.appointment_stats.total,
-                        "completed": report.appointment_stats.completed,
-                        "scheduled": report.appointment_stats.scheduled,
-                        "cancelled": report.appointment_stats.cancelled
-                    },
-                    "summary": report.summary
-                }
-                
-                if report.daily_breakdown:
-                    result["daily_breakdown"] = [
-                        {"date": item.date.isoformat(), "count": item.count}
-                        for item in report.daily_breakdown
-                    ]
-                    
-                if report.common_conditions:
-                    result["common_conditions"] = [
-                        {"condition": item.condition, "count": item.count}
-                        for item in report.common_conditions
-                    ]
-                
-                return result
-            except Exception as e:
-                return {
-                    "success": False,
-                    "message": f"Failed to generate report: {str(e)}"
-                }
+                reports.append(report)
+                if progress:
+                    progress(index + 1, len(windows), {
+                        "date_from": window_from.isoformat() if window_from else None,
+                        "date_to": window_to.isoformat() if window_to else None,
+                        "appointment_stats": report.appointment_stats.dict()
+                    })
+            report = reports[0] if len(reports) == 1 else self._merge_reports(reports)
+            
+            # Send notification
+            self.notification_service.send_report_notification(db, doctor_id, report)
+            
+            return self._report_result(report)
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Failed to generate report: {str(e)}"
+            }
+
+    @staticmethod
+    def _report_windows(date_from, date_to) -> List[tuple]:
+        """Split a date range into periods of MCP_REPORT_WINDOW_DAYS days"""
+        window = timedelta(days=settings.MCP_REPORT_WINDOW_DAYS)
+        if not date_from or not date_to or date_to - date_from < window:
+            return [(date_from, date_to)]
+        
+        windows = []
+        start = date_from
+        while start <= date_to:
+            end = min(start + window - timedelta(days=1), date_to)
+            windows.append((start, end))
+            start = end + timedelta(days=1)
+        return windows
+
+    @staticmethod
+    def _merge_reports(reports: List[DoctorReport]) -> DoctorReport:
+        """Combine the reports of consecutive periods into one"""
+        conditions: Dict[str, int] = {}
+        daily_breakdown = []
+        for report in reports:
+            daily_breakdown.extend(report.daily_breakdown or [])
+            for item in report.common_conditions or []:
+                conditions[item.condition] = conditions.get(item.condition, 0) + item.count
+        
+        return DoctorReport(
+            doctor_id=reports[0].doctor_id,
+            doctor_name=reports[0].doctor_name,
+            appointment_stats=AppointmentStats(
+                total=sum(report.appointment_stats.total for report in reports),
+                completed=sum(report.appointment_stats.completed for report in reports),
+                scheduled=sum(report.appointment_stats.scheduled for report in reports),
+                cancelled=sum(report.appointment_stats.cancelled for report in reports)
+            ),
+            daily_breakdown=daily_breakdown or None,
+            common_conditions=[
+                PatientCondition(condition=condition, count=count)
+                for condition, count in sorted(conditions.items(), key=lambda item: -item[1])
+            ] or None,
+            summary="\n".join(report.summary for report in reports if report.summary)
+        )
 
-        # Add more tools as needed...
\ No newline at end of file
+    @staticmethod
+    def _report_result(report: DoctorReport) -> Dict[str, Any]:
+        result = {
+            "doctor_id": report.doctor_id,
+            "doctor_name": report.doctor_name,
+            "report_date": report.report_date.isoformat(),
+            "appointment_stats": {
+                "total": report.appointment_stats.total,
+                "completed": report.appointment_stats.completed,
+                "scheduled": report.appointment_stats.scheduled,
+                "cancelled": report.appointment_stats.cancelled
+            },
+            "summary": report.summary
+        }
+        
+        if report.daily_breakdown:
+            result["daily_breakdown"] = [
+                {"date": item.date.isoformat(), "count": item.count}
+                for item in report.daily_breakdown
+            ]
+            
+        if report.common_conditions:
+            result["common_conditions"] = [
+                {"condition": item.condition, "count": item.count}
+                for item in report.common_conditions
+            ]
+        
+        return result
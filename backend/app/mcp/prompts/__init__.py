@@ -0,0 +1 @@
+from app.mcp.prompts.appointment_prompts import register_appointment_prompts
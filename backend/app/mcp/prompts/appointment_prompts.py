@@ -0,0 +1,39 @@
+from typing import Optional
+
+from app.core.templates import templates
+
+
+def register_appointment_prompts(server) -> None:
+    """Register MCP prompts on an MCPAppointmentServer; their text lives in app/templates/prompts/mcp"""
+
+    @server.mcp_server.prompt("schedule_appointment")
+    async def schedule_appointment_prompt(
+        patient_id: int,
+        patient_name: Optional[str] = None,
+        symptoms: Optional[str] = None,
+        preferred_dates: Optional[str] = None,
+        time_of_day: Optional[str] = None
+    ) -> str:
+        """Guide an agent through booking an appointment with the fewest tool calls."""
+        return templates.render(
+            "prompts/mcp/schedule_appointment.txt",
+            patient_id=patient_id,
+            patient_name=patient_name,
+            symptoms=symptoms,
+            preferred_dates=preferred_dates,
+            time_of_day=time_of_day
+        )
+
+    @server.mcp_server.prompt("doctor_report_review")
+    async def doctor_report_review_prompt(
+        doctor_id: int,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> str:
+        """Ask an agent to fetch and summarize a doctor's report."""
+        return templates.render(
+            "prompts/mcp/doctor_report_review.txt",
+            doctor_id=doctor_id,
+            date_from=date_from,
+            date_to=date_to
+        )
@@ -0,0 +1,4 @@
+from app.mcp.tools.availability_tools import register_availability_tools
+from app.mcp.tools.appointment_tools import register_appointment_tools
+from app.mcp.tools.calendar_tools import register_calendar_tools
+from app.mcp.tools.report_tools import register_report_tools
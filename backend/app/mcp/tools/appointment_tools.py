@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.mcp.executor import ToolTimeoutError, in_progress_result
+from app.services.slot_hold_service import slot_holds, SlotUnavailableError, HoldNotFoundError
+
+MAX_APPOINTMENTS_PER_BATCH = 20
+
+
+def schedule_appointments_batch(server, db: Session, appointments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Book each requested appointment; failures don't stop the rest of the batch"""
+    if len(appointments) > MAX_APPOINTMENTS_PER_BATCH:
+        return {
+            "success": False,
+            "message": f"At most {MAX_APPOINTMENTS_PER_BATCH} appointments per call"
+        }
+
+    results = []
+    for index, item in enumerate(appointments):
+        try:
+            outcome = server._schedule_appointment(
+                db,
+                item["doctor_id"],
+                item["patient_id"],
+                item["appointment_time"],
+                item.get("duration_minutes", 30),
+                item.get("reason"),
+                item.get("symptoms"),
+                item.get("hold_id"),
+                item.get("idempotency_key")
+            )
+        except KeyError as e:
+            outcome = {"success": False, "message": f"Missing field {str(e)}"}
+
+        if outcome.get("success"):
+            results.append({
+                "index": index,
+                "success": True,
+                "appointment_id": outcome["appointment_id"],
+                "appointment_time": outcome["appointment_time"]
+            })
+        else:
+            results.append({"index": index, "success": False, "message": outcome.get("message")})
+
+    booked = sum(1 for result in results if result["success"])
+    return {
+        "success": booked == len(results),
+        "results": results,
+        "message": f"Scheduled {booked} of {len(results)} appointments"
+    }
+
+
+def register_appointment_tools(server) -> None:
+    """Register batched booking tools on an MCPAppointmentServer"""
+
+    @server.mcp_server.tool("schedule_appointments_batch")
+    async def schedule_appointments_batch_tool(
+        appointments: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Schedule several appointments in one call.
+        
+        Args:
+            appointments: Items with doctor_id, patient_id, appointment_time (ISO format)
+                and optional duration_minutes, reason, symptoms, hold_id and idempotency_key
+                
+        Returns:
+            One result per item, in order, with the appointment ID or an error message
+        """
+        try:
+            return await server.tool_executor.run(
+                "schedule_appointments_batch", server.with_session,
+                lambda db: schedule_appointments_batch(server, db, appointments)
+            )
+        except ToolTimeoutError as e:
+            # Some of the bookings may still be committed by the worker thread
+            return in_progress_result(
+                e, "call again with the same idempotency_key per item to get their outcomes, "
+                   "or check the patients' appointments"
+            )
+
+    @server.mcp_server.tool("hold_slot")
+    async def hold_slot(
+        doctor_id: int,
+        patient_id: int,
+        appointment_time: str,
+        duration_minutes: int = 30
+    ) -> Dict[str, Any]:
+        """
+        Reserve a slot for a few minutes while the booking is discussed with the patient.
+        
+        Args:
+            doctor_id: ID of the doctor
+            patient_id: ID of the patient
+            appointment_time: ISO format datetime string for appointment
+            duration_minutes: Duration of appointment in minutes
+            
+        Returns:
+            The hold ID to pass to schedule_appointment, and when the hold expires
+        """
+        try:
+            start_time = datetime.fromisoformat(appointment_time)
+            hold = await server.tool_executor.run(
+                "hold_slot", server.with_session, slot_holds.hold_available,
+                doctor_id, patient_id, start_time, start_time + timedelta(minutes=duration_minutes)
+            )
+        except (ValueError, SlotUnavailableError) as e:
+            return {"success": False, "message": f"Failed to hold slot: {str(e)}"}
+        except ToolTimeoutError as e:
+            return in_progress_result(e, "call hold_slot again; a repeated hold of your own slot succeeds")
+        return {
+            "success": True,
+            "hold_id": hold.id,
+            "expires_at": datetime.fromtimestamp(hold.expires_at).isoformat()
+        }
+
+    @server.mcp_server.tool("release_slot_hold")
+    async def release_slot_hold(hold_id: str) -> Dict[str, Any]:
+        """
+        Release a held slot that the patient no longer wants.
+        
+        Args:
+            hold_id: ID returned by hold_slot
+            
+        Returns:
+            Whether the hold was released
+        """
+        try:
+            slot_holds.release(hold_id)
+        except HoldNotFoundError as e:
+            return {"success": False, "message": str(e)}
+        return {"success": True, "message": "Slot released"}
@@ -0,0 +1,101 @@
+from datetime import datetime, date as date_type
+from typing import Any, Dict, List, Optional
+
+from fastapi import Depends
+
+from app.mcp.cache import get_mcp_session_id
+from app.mcp.executor import ToolTimeoutError
+
+# Upper bound on doctor x date combinations answered by one call
+MAX_AVAILABILITY_CELLS = 100
+
+TIME_OF_DAY_HOURS = {
+    "morning": (0, 12),
+    "afternoon": (12, 17),
+    "evening": (17, 24),
+}
+
+
+def merge_slots(slots: List[Dict[str, str]]) -> List[str]:
+    """Collapse consecutive slots into compact "HH:MM-HH:MM" windows"""
+    windows = []
+    for slot in slots:
+        if windows and windows[-1][1] == slot["start_time"]:
+            windows[-1][1] = slot["end_time"]
+        else:
+            windows.append([slot["start_time"], slot["end_time"]])
+    return [f"{start}-{end}" for start, end in windows]
+
+
+def filter_time_of_day(slots: List[Dict[str, str]], time_of_day: Optional[str]) -> List[Dict[str, str]]:
+    hours = TIME_OF_DAY_HOURS.get((time_of_day or "").lower())
+    if not hours:
+        return slots
+    return [slot for slot in slots if hours[0] <= int(slot["start_time"][:2]) < hours[1]]
+
+
+def check_availability_batch(server, doctor_ids: List[int], dates: List[str],
+                             time_of_day: Optional[str] = None) -> Dict[str, Any]:
+    """Availability of every doctor on every date, as merged free windows"""
+    try:
+        parsed_dates = sorted({datetime.fromisoformat(value).date() for value in dates})
+    except ValueError as e:
+        return {"success": False, "message": f"Dates must be in YYYY-MM-DD format: {str(e)}"}
+
+    if len(doctor_ids) * len(parsed_dates) > MAX_AVAILABILITY_CELLS:
+        return {
+            "success": False,
+            "message": f"At most {MAX_AVAILABILITY_CELLS} doctor/date combinations per call"
+        }
+
+    try:
+        slots = server.appointment_service.get_available_slots_batch(doctor_ids, parsed_dates)
+    except Exception as e:
+        return {"success": False, "message": f"Error checking availability: {str(e)}"}
+
+    availability = []
+    for doctor_id in doctor_ids:
+        free = {}
+        for day in parsed_dates:
+            windows = merge_slots(filter_time_of_day(slots.get(doctor_id, {}).get(day, []), time_of_day))
+            if windows:
+                free[day.isoformat()] = windows
+        availability.append({"doctor_id": doctor_id, "free": free})
+
+    return {
+        "success": True,
+        "availability": availability,
+        "message": f"Checked {len(doctor_ids)} doctors on {len(parsed_dates)} dates"
+    }
+
+
+def register_availability_tools(server) -> None:
+    """Register batched availability tools on an MCPAppointmentServer"""
+
+    @server.mcp_server.tool("check_availability_batch")
+    async def check_availability_batch_tool(
+        doctor_ids: List[int],
+        dates: List[str],
+        time_of_day: Optional[str] = None,
+        session_id: Optional[str] = Depends(get_mcp_session_id)
+    ) -> Dict[str, Any]:
+        """
+        Check availability of several doctors on several dates in one call.
+        
+        Args:
+            doctor_ids: IDs of the doctors to check
+            dates: Dates in YYYY-MM-DD format
+            time_of_day: Optional "morning", "afternoon" or "evening"
+            
+        Returns:
+            Free windows per doctor and date, e.g. {"2024-05-02": ["09:00-11:30"]};
+            dates without free time are omitted
+        """
+        try:
+            return await server.run_read_tool(
+                session_id, "check_availability_batch",
+                {"doctor_ids": doctor_ids, "dates": dates, "time_of_day": time_of_day},
+                check_availability_batch, server, doctor_ids, dates, time_of_day
+            )
+        except ToolTimeoutError as e:
+            return {"success": False, "message": f"Error checking availability: {str(e)}"}
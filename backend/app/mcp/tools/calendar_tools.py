@@ -0,0 +1,74 @@
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.mcp.executor import ToolTimeoutError, in_progress_result
+from app.services.booking_context import load_booking_contexts
+
+MAX_EVENTS_PER_BATCH = 50
+
+
+def create_calendar_events_batch(server, db: Session, appointment_ids: List[int]) -> Dict[str, Any]:
+    """Add appointments that have no calendar event yet to their doctors' calendars"""
+    if len(appointment_ids) > MAX_EVENTS_PER_BATCH:
+        return {"success": False, "message": f"At most {MAX_EVENTS_PER_BATCH} appointments per call"}
+
+    # Appointments with their doctors and patients, in one query
+    contexts = load_booking_contexts(db, appointment_ids)
+
+    pending = [context for context in contexts.values() if not context.appointment.calendar_event_id]
+
+    # Events are inserted through Calendar batch requests
+    try:
+        event_ids = server.calendar_service.create_booking_events(pending)
+    except Exception as e:
+        event_ids = {}
+        print(f"Error creating calendar events: {e}")
+
+    results = []
+    for appointment_id in appointment_ids:
+        context = contexts.get(appointment_id)
+        if context is None:
+            results.append({"appointment_id": appointment_id, "success": False, "message": "Not found"})
+            continue
+        appointment = context.appointment
+        if not appointment.calendar_event_id:
+            appointment.calendar_event_id = event_ids.get(appointment_id)
+        results.append({"appointment_id": appointment_id, "success": appointment.calendar_event_id is not None,
+                        "calendar_event_id": appointment.calendar_event_id})
+    db.commit()
+
+    created = sum(1 for result in results if result["success"])
+    return {
+        "success": created == len(results),
+        "results": results,
+        "message": f"{created} of {len(results)} appointments are on the calendar"
+    }
+
+
+def register_calendar_tools(server) -> None:
+    """Register batched calendar tools on an MCPAppointmentServer"""
+
+    @server.mcp_server.tool("create_calendar_events_batch")
+    async def create_calendar_events_batch_tool(
+        appointment_ids: List[int]
+    ) -> Dict[str, Any]:
+        """
+        Add several appointments to their doctors' Google Calendars in one call.
+        
+        Args:
+            appointment_ids: IDs of the appointments; ones already on the calendar are skipped
+            
+        Returns:
+            The calendar event ID or an error message per appointment
+        """
+        try:
+            return await server.tool_executor.run(
+                "create_calendar_events_batch", server.with_session,
+                lambda db: create_calendar_events_batch(server, db, appointment_ids)
+            )
+        except ToolTimeoutError as e:
+            # Events may still be created and saved by the worker thread
+            return in_progress_result(
+                e, "call again later; appointments already on the calendar are skipped"
+            )
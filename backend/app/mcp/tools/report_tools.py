@@ -0,0 +1,78 @@
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.mcp.cache import get_mcp_session_id
+
+MAX_REPORTS_PER_BATCH = 20
+
+
+def get_doctor_reports_batch(server, db: Session, doctor_ids: List[int], date_from: Optional[str],
+                             date_to: Optional[str], condition: Optional[str],
+                             progress: Optional[Callable] = None) -> Dict[str, Any]:
+    """Report stats and summary for each doctor, without the daily breakdowns"""
+    if len(doctor_ids) > MAX_REPORTS_PER_BATCH:
+        return {"success": False, "message": f"At most {MAX_REPORTS_PER_BATCH} doctors per call"}
+
+    reports = []
+    for index, doctor_id in enumerate(doctor_ids):
+        report = server._get_doctor_report(db, doctor_id, date_from, date_to, condition)
+        if "appointment_stats" not in report:
+            reports.append({"doctor_id": doctor_id, "success": False, "message": report.get("message")})
+        else:
+            reports.append({
+                "doctor_id": doctor_id,
+                "doctor_name": report["doctor_name"],
+                "stats": report["appointment_stats"],
+                "summary": report.get("summary"),
+                "top_conditions": [item["condition"] for item in report.get("common_conditions", [])[:3]]
+            })
+        if progress:
+            progress(index + 1, len(doctor_ids), reports[-1])
+
+    return {
+        "success": all(report.get("success", True) for report in reports),
+        "reports": reports,
+        "message": f"Generated {len(reports)} reports"
+    }
+
+
+def register_report_tools(server) -> None:
+    """Register batched report tools on an MCPAppointmentServer"""
+
+    @server.mcp_server.tool("get_doctor_reports_batch")
+    async def get_doctor_reports_batch_tool(
+        doctor_ids: List[int],
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        condition: Optional[str] = None,
+        session_id: Optional[str] = Depends(get_mcp_session_id)
+    ) -> Dict[str, Any]:
+        """
+        Get summary reports for several doctors in one call.
+        
+        Runs in the background like get_doctor_report: if not done within a few
+        seconds the job status is returned, each finished doctor is sent as a
+        progress notification, and get_report_job returns the final result.
+        
+        Args:
+            doctor_ids: IDs of the doctors
+            date_from: Optional start date in YYYY-MM-DD format
+            date_to: Optional end date in YYYY-MM-DD format
+            condition: Optional medical condition to filter by
+            
+        Returns:
+            Appointment stats, summary and top conditions per doctor,
+            or the status of the job computing them
+        """
+        job = await server.report_jobs.submit(
+            session_id, "get_doctor_reports_batch",
+            {"doctor_ids": doctor_ids, "date_from": date_from, "date_to": date_to, "condition": condition},
+            lambda progress: server.with_session(
+                lambda db: get_doctor_reports_batch(server, db, doctor_ids, date_from, date_to, condition, progress)
+            ),
+            doctor_ids, server.notify_job_progress
+        )
+        return await server.report_jobs.wait(job, settings.MCP_REPORT_WAIT_SECONDS)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 from app.db.models import AppointmentStatus
@@ -13,6 +13,21 @@ class AppointmentBase(BaseModel):
 class AppointmentCreate(AppointmentBase):
     patient_id: int
 
+class SlotHoldCreate(AppointmentCreate):
+    ttl_seconds: Optional[int] = Field(None, gt=0)
+
+class SlotHoldConfirm(BaseModel):
+    reason: Optional[str] = None
+    symptoms: Optional[str] = None
+
+class SlotHold(BaseModel):
+    hold_id: str
+    doctor_id: int
+    patient_id: int
+    appointment_time: datetime
+    end_time: datetime
+    expires_at: datetime
+
 class AppointmentUpdate(BaseModel):
     status: Optional[AppointmentStatus] = None
     diagnosis: Optional[str] = None
@@ -25,6 +40,7 @@ class AppointmentInDB(AppointmentBase):
     diagnosis: Optional[str] = None
     created_at: datetime
     calendar_event_id: Optional[str] = None
+    summary: Optional[str] = None
     
     class Config:
         orm_mode = True
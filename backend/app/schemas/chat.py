@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class ChatTurn(BaseModel):
+    role: str
+    content: str
+
+class ChatRequest(BaseModel):
+    prompt: str
+    session_id: Optional[str] = None
+    # Sent by older clients; the server keeps the conversation itself
+    conversation_history: Optional[List[ChatTurn]] = None
+    user_id: Optional[int] = None
+    role: Optional[str] = None
+
+class ChatResponse(BaseModel):
+    response: str
+    session_id: str
+    conversation_history: List[ChatTurn]
+    timestamp: datetime
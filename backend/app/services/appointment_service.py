@@ -20,13 +20,9 @@ class AppointmentService:
             return []  # No schedule for this day
         
         schedule = schedule_response.data[0]
-        start_time = datetime.strptime(schedule['start_time'], "%H:%M").time()
-        end_time = datetime.strptime(schedule['end_time'], "%H:%M").time()
+        start_datetime, end_datetime = self._working_hours(date, schedule)
         
         # Get existing appointments for the day
-        start_datetime = datetime.combine(date, start_time)
-        end_datetime = datetime.combine(date, end_time)
-        
         appointments_response = self.supabase.table("appointments") \
             .select("date_time, duration_minutes") \
             .eq("doctor_id", doctor_id) \
@@ -34,9 +30,57 @@ class AppointmentService:
             .lt("date_time", end_datetime.isoformat()) \
             .execute()
         
+        return self._free_slots(date, schedule, appointments_response.data)
+    
+    def get_available_slots_batch(self, doctor_ids: List[int], dates: List[datetime.date]) -> Dict[int, Dict[datetime.date, List[Dict]]]:
+        """Get available slots for several doctors and dates with two queries in total"""
+        if not doctor_ids or not dates:
+            return {}
+        
+        schedules_response = self.supabase.table("schedules") \
+            .select("*") \
+            .in_("doctor_id", doctor_ids) \
+            .execute()
+        schedules = {}
+        for schedule in schedules_response.data or []:
+            schedules.setdefault((schedule['doctor_id'], schedule['day_of_week']), schedule)
+        
+        range_start = datetime.combine(min(dates), datetime.min.time())
+        range_end = datetime.combine(max(dates) + timedelta(days=1), datetime.min.time())
+        appointments_response = self.supabase.table("appointments") \
+            .select("doctor_id, date_time, duration_minutes") \
+            .in_("doctor_id", doctor_ids) \
+            .gte("date_time", range_start.isoformat()) \
+            .lt("date_time", range_end.isoformat()) \
+            .execute()
+        appointments = {}
+        for appointment in appointments_response.data or []:
+            day = datetime.fromisoformat(appointment['date_time']).date()
+            appointments.setdefault((appointment['doctor_id'], day), []).append(appointment)
+        
+        result = {}
+        for doctor_id in doctor_ids:
+            result[doctor_id] = {}
+            for date in dates:
+                schedule = schedules.get((doctor_id, date.weekday()))
+                result[doctor_id][date] = self._free_slots(
+                    date, schedule, appointments.get((doctor_id, date), [])
+                ) if schedule else []
+        return result
+    
+    @staticmethod
+    def _working_hours(date: datetime.date, schedule: Dict) -> tuple:
+        start_time = datetime.strptime(schedule['start_time'], "%H:%M").time()
+        end_time = datetime.strptime(schedule['end_time'], "%H:%M").time()
+        return datetime.combine(date, start_time), datetime.combine(date, end_time)
+    
+    def _free_slots(self, date: datetime.date, schedule: Dict, appointments: List[Dict]) -> List[Dict]:
+        """Split a day's working hours into 30-minute slots that don't overlap any appointment"""
+        start_datetime, end_datetime = self._working_hours(date, schedule)
+        
         # Create a list of busy time slots
         busy_slots = []
-        for appointment in appointments_response.data:
+        for appointment in appointments:
             appt_time = datetime.fromisoformat(appointment['date_time'])
             duration = appointment['duration_minutes']
             busy_slots.append({
@@ -0,0 +1,81 @@
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.db import models
+
+
+class BookingContext:
+    """An appointment together with its doctor and patient rows (users included).
+
+    Loaded once per booking and handed to the calendar and email steps, so
+    they don't each query the same doctor and patient again.
+    """
+
+    def __init__(self, appointment: models.Appointment, doctor: models.Doctor, patient: models.Patient):
+        self.appointment = appointment
+        self.doctor = doctor
+        self.patient = patient
+
+    @property
+    def doctor_name(self) -> str:
+        return self.doctor.user.full_name
+
+    @property
+    def patient_name(self) -> str:
+        return self.patient.user.full_name
+
+    @classmethod
+    def load(cls, db: Session, appointment: models.Appointment) -> Optional["BookingContext"]:
+        """Context for one appointment that is already loaded; None if its doctor or patient is missing"""
+        return load_booking_contexts_for(db, [appointment]).get(appointment.id)
+
+
+def load_booking_contexts_for(db: Session, appointments: Iterable[models.Appointment]) -> Dict[int, BookingContext]:
+    """Contexts for already-loaded appointments, keyed by appointment id.
+
+    Doctors and patients of all the appointments are fetched with one query
+    each, whatever the number of appointments.
+    """
+    appointments = list(appointments)
+    doctor_ids = {appointment.doctor_id for appointment in appointments}
+    patient_ids = {appointment.patient_id for appointment in appointments}
+
+    doctors = {
+        doctor.id: doctor for doctor in db.query(models.Doctor)
+        .options(joinedload(models.Doctor.user))
+        .filter(models.Doctor.id.in_(doctor_ids))
+        .all()
+    } if doctor_ids else {}
+    patients = {
+        patient.id: patient for patient in db.query(models.Patient)
+        .options(joinedload(models.Patient.user))
+        .filter(models.Patient.id.in_(patient_ids))
+        .all()
+    } if patient_ids else {}
+
+    contexts = {}
+    for appointment in appointments:
+        doctor = doctors.get(appointment.doctor_id)
+        patient = patients.get(appointment.patient_id)
+        if doctor is not None and patient is not None:
+            contexts[appointment.id] = BookingContext(appointment, doctor, patient)
+    return contexts
+
+
+def load_booking_contexts(db: Session, appointment_ids: List[int]) -> Dict[int, BookingContext]:
+    """Contexts for appointments by id, loaded in a single joined query"""
+    if not appointment_ids:
+        return {}
+    appointments = db.query(models.Appointment)\
+        .options(
+            joinedload(models.Appointment.doctor).joinedload(models.Doctor.user),
+            joinedload(models.Appointment.patient).joinedload(models.Patient.user)
+        )\
+        .filter(models.Appointment.id.in_(appointment_ids))\
+        .all()
+    return {
+        appointment.id: BookingContext(appointment, appointment.doctor, appointment.patient)
+        for appointment in appointments
+        if appointment.doctor is not None and appointment.patient is not None
+    }
@@ -1,16 +1,90 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
 from datetime import datetime
 import os
 import json
+import threading
 
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
 
 from app.db import models
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.booking_context import BookingContext
+
+# Calendar API limit on requests per batch HTTP request
+MAX_REQUESTS_PER_BATCH = 50
+
+
+class CalendarClientCache:
+    """Built Calendar API clients, one per set of credentials.
+
+    `build()` is only called the first time a credential is seen, with the
+    discovery document bundled in googleapiclient instead of a fetch, and
+    the client (with its HTTP connection) is reused afterwards. Clients are
+    not thread-safe, so each comes with a lock that callers hold while
+    executing requests. `api_endpoint` overrides the Google root URL, e.g.
+    to point at a local fake server.
+    """
+
+    def __init__(self, max_entries: int, api_endpoint: str = ""):
+        self.max_entries = max_entries
+        self.api_endpoint = api_endpoint.rstrip("/")
+        self._clients: "OrderedDict[Tuple, Tuple[Any, threading.Lock]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def credentials_key(credentials: Credentials) -> Tuple:
+        # The refresh token identifies the grant; access tokens change on refresh
+        return (
+            type(credentials).__name__,
+            getattr(credentials, "client_id", None),
+            getattr(credentials, "refresh_token", None) or getattr(credentials, "token", None),
+            getattr(credentials, "service_account_email", None)
+        )
+
+    def get(self, credentials: Credentials) -> Tuple[Any, threading.Lock]:
+        """The cached client for these credentials and the lock guarding it"""
+        key = self.credentials_key(credentials)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients.move_to_end(key)
+                metrics.inc("calendar_client_cache_total", outcome="hit")
+                return entry
+
+        metrics.inc("calendar_client_cache_total", outcome="miss")
+        client_options = {"api_endpoint": f"{self.api_endpoint}/calendar/v3/"} if self.api_endpoint else None
+        service = build(
+            'calendar', 'v3',
+            credentials=credentials,
+            static_discovery=True,
+            cache_discovery=False,
+            client_options=client_options
+        )
+        with self._lock:
+            entry = self._clients.setdefault(key, (service, threading.Lock()))
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_entries:
+                self._clients.popitem(last=False)
+        return entry
+
+    def new_batch(self, service, callback: Callable) -> BatchHttpRequest:
+        """Batch request for a client, sent to the overridden endpoint if there is one"""
+        if self.api_endpoint:
+            return BatchHttpRequest(callback=callback, batch_uri=f"{self.api_endpoint}/batch/calendar/v3")
+        return service.new_batch_http_request(callback=callback)
+
+
+calendar_clients = CalendarClientCache(
+    max_entries=settings.GOOGLE_CALENDAR_CLIENT_CACHE_SIZE,
+    api_endpoint=settings.GOOGLE_CALENDAR_API_ENDPOINT
+)
 
 class CalendarService:
     def create_calendar_event(
@@ -25,66 +99,50 @@ class CalendarService:
     ) -> Optional[str]:
         """Create a calendar event for an appointment and return the event ID."""
         try:
-            # Get doctor and patient information
-            doctor = db.query(models.Doctor).join(models.User).filter(
-                models.Doctor.id == doctor_id
-            ).first()
-            
-            patient = db.query(models.Patient).join(models.User).filter(
-                models.Patient.id == patient_id
+            appointment = db.query(models.Appointment).filter(
+                models.Appointment.id == appointment_id
             ).first()
+            context = BookingContext.load(db, appointment) if appointment else None
             
-            if not doctor or not patient:
+            if not context:
                 raise HTTPException(status_code=404, detail="Doctor or patient not found")
-                
+            
+            return self.create_booking_event(context)
+            
+        except Exception as e:
+            # Handle other errors
+            print(f"Error creating calendar event: {e}")
+            return None
+    
+    def create_booking_event(self, context: BookingContext) -> Optional[str]:
+        """Create the calendar event for a booking whose rows are already loaded."""
+        appointment, doctor = context.appointment, context.doctor
+        try:
             # Get doctor's calendar ID
             calendar_id = doctor.calendar_id or 'primary'
             
             # Get doctor's credentials
             # In a real application, you would store and retrieve OAuth tokens
             # Here we're using a simplified approach
-            credentials = self._get_google_credentials(doctor_id)
+            credentials = self._get_google_credentials(doctor.id)
             
             if not credentials:
                 # Fall back to service account if user credentials not available
                 return self._create_event_with_service_account(
                     calendar_id, 
-                    doctor.user.full_name,
-                    patient.user.full_name,
-                    start_time,
-                    end_time,
-                    reason
+                    context.doctor_name,
+                    context.patient_name,
+                    appointment.appointment_time,
+                    appointment.end_time,
+                    appointment.reason
                 )
             
-            # Create Calendar API service
-            service = build('calendar', 'v3', credentials=credentials)
+            # Cached Calendar API client for these credentials
+            service, lock = calendar_clients.get(credentials)
             
             # Create event
-            event = {
-                'summary': f'Appointment with {patient.user.full_name}',
-                'description': reason or 'Medical appointment',
-                'start': {
-                    'dateTime': start_time.isoformat(),
-                    'timeZone': 'UTC',
-                },
-                'end': {
-                    'dateTime': end_time.isoformat(),
-                    'timeZone': 'UTC',
-                },
-                'attendees': [
-                    {'email': doctor.user.email},
-                    {'email': patient.user.email},
-                ],
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'email', 'minutes': 24 * 60},
-                        {'method': 'popup', 'minutes': 30},
-                    ],
-                },
-            }
-            
-            event = service.events().insert(calendarId=calendar_id, body=event).execute()
+            with lock:
+                event = service.events().insert(calendarId=calendar_id, body=self._event_body(context)).execute()
             return event.get('id')
             
         except HttpError as error:
@@ -97,6 +155,103 @@ class CalendarService:
             print(f"Error creating calendar event: {e}")
             return None
     
+    def create_booking_events(self, contexts: List[BookingContext]) -> Dict[int, Optional[str]]:
+        """Create calendar events for many bookings; returns event IDs by appointment ID.
+        
+        Events of doctors sharing credentials are inserted through Calendar
+        batch HTTP requests of up to MAX_REQUESTS_PER_BATCH events each.
+        """
+        event_ids: Dict[int, Optional[str]] = {}
+        by_credentials: Dict[Tuple, Tuple[Credentials, List[BookingContext]]] = {}
+        
+        for context in contexts:
+            credentials = self._get_google_credentials(context.doctor.id)
+            if not credentials:
+                # Fall back to service account if user credentials not available
+                event_ids[context.appointment.id] = self.create_booking_event(context)
+                continue
+            key = calendar_clients.credentials_key(credentials)
+            by_credentials.setdefault(key, (credentials, []))[1].append(context)
+        
+        for credentials, group in by_credentials.values():
+            responses = self.execute_batch(credentials, [
+                (
+                    str(context.appointment.id),
+                    lambda service, context=context: service.events().insert(
+                        calendarId=context.doctor.calendar_id or 'primary',
+                        body=self._event_body(context)
+                    )
+                )
+                for context in group
+            ])
+            for context in group:
+                response = responses.get(str(context.appointment.id))
+                if isinstance(response, Exception):
+                    print(f"Google Calendar API Error: {response}")
+                    event_ids[context.appointment.id] = None
+                else:
+                    event_ids[context.appointment.id] = response.get('id') if response else None
+        
+        return event_ids
+    
+    def execute_batch(
+        self,
+        credentials: Credentials,
+        requests: List[Tuple[str, Callable[[Any], Any]]]
+    ) -> Dict[str, Any]:
+        """Run (request_id, build_request(service)) pairs as Calendar batch HTTP requests.
+        
+        Works for any mix of event inserts, updates or patches. Returns the
+        response, or the exception, for each request ID.
+        """
+        service, lock = calendar_clients.get(credentials)
+        responses: Dict[str, Any] = {}
+        
+        def callback(request_id, response, exception):
+            responses[request_id] = exception if exception is not None else response
+        
+        with lock:
+            for start in range(0, len(requests), MAX_REQUESTS_PER_BATCH):
+                batch = calendar_clients.new_batch(service, callback)
+                for request_id, build_request in requests[start:start + MAX_REQUESTS_PER_BATCH]:
+                    batch.add(build_request(service), request_id=request_id)
+                try:
+                    batch.execute()
+                except Exception as e:
+                    # The whole batch request failed; report it for each of its requests
+                    for request_id, _ in requests[start:start + MAX_REQUESTS_PER_BATCH]:
+                        responses.setdefault(request_id, e)
+                metrics.inc("calendar_batch_requests_total")
+        
+        return responses
+    
+    @staticmethod
+    def _event_body(context: BookingContext) -> Dict[str, Any]:
+        appointment = context.appointment
+        return {
+            'summary': f'Appointment with {context.patient_name}',
+            'description': appointment.reason or 'Medical appointment',
+            'start': {
+                'dateTime': appointment.appointment_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+            'end': {
+                'dateTime': appointment.end_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+            'attendees': [
+                {'email': context.doctor.user.email},
+                {'email': context.patient.user.email},
+            ],
+            'reminders': {
+                'useDefault': False,
+                'overrides': [
+                    {'method': 'email', 'minutes': 24 * 60},
+                    {'method': 'popup', 'minutes': 30},
+                ],
+            },
+        }
+    
     def _create_event_with_service_account(
         self,
         calendar_id: str,
@@ -0,0 +1,193 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.templates import templates
+from app.services.llm_service import LLMService, llm_service
+from app.services.prompt_builder import estimate_tokens, truncate_to_tokens
+
+
+class ChatSession:
+    """One conversation: a rolling window of recent turns plus a summary of older ones"""
+
+    def __init__(self, session_id: str, user_id: Optional[int]):
+        self.id = session_id
+        self.user_id = user_id
+        self.summary = ""
+        self.turns: List[Dict[str, str]] = []
+        # Turns that left the window but are not folded into the summary yet
+        self.pending: List[Dict[str, str]] = []
+        # Whether a background task is folding `pending` into the summary
+        self.folding = False
+        self.last_active = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    @property
+    def tokens(self) -> int:
+        """Tokens held in memory, including turns waiting to be folded"""
+        return self.window_tokens + sum(estimate_tokens(turn["content"]) for turn in self.pending)
+
+    @property
+    def window_tokens(self) -> int:
+        """Tokens sent to the LLM: the summary and the window of recent turns"""
+        return estimate_tokens(self.summary) + sum(estimate_tokens(turn["content"]) for turn in self.turns)
+
+
+class ChatSessionStore:
+    """Memory-bounded store of chat sessions.
+
+    Sessions idle for longer than `idle_seconds` are dropped, and the least
+    recently used ones are evicted when the store holds more than
+    `max_sessions` sessions or `max_total_tokens` tokens overall.
+    """
+
+    def __init__(self, max_sessions: int, max_total_tokens: int, idle_seconds: float):
+        self.max_sessions = max_sessions
+        self.max_total_tokens = max_total_tokens
+        self.idle_seconds = idle_seconds
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+
+    def get_or_create(self, session_id: Optional[str], user_id: Optional[int]) -> ChatSession:
+        self.evict()
+        session = self._sessions.get(session_id) if session_id else None
+        if session is not None and session.user_id != user_id:
+            # Never hand one user's conversation to another, nor replace it
+            session, session_id = None, None
+        if session is None:
+            session = ChatSession(session_id or uuid.uuid4().hex, user_id)
+            self._sessions[session.id] = session
+        session.last_active = time.monotonic()
+        self._sessions.move_to_end(session.id)
+        return session
+
+    def delete(self, session_id: str, user_id: Optional[int]) -> bool:
+        session = self._sessions.get(session_id)
+        if session is None or session.user_id != user_id:
+            return False
+        del self._sessions[session_id]
+        return True
+
+    def evict(self) -> None:
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_active > self.idle_seconds:
+                del self._sessions[session_id]
+                metrics.inc("chat_sessions_evicted_total", reason="idle")
+
+        total = sum(session.tokens for session in self._sessions.values())
+        while self._sessions and (len(self._sessions) > self.max_sessions or total > self.max_total_tokens):
+            _, session = self._sessions.popitem(last=False)
+            total -= session.tokens
+            metrics.inc("chat_sessions_evicted_total", reason="capacity")
+
+        metrics.set_gauge("chat_sessions", len(self._sessions))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class ChatService:
+    """Server-side conversations for the chat assistant.
+
+    Each turn sends the LLM only the cached summary of older turns and a
+    rolling window of recent ones, never the full transcript. Turns that
+    fall out of the window (or push the session over its token cap) are
+    folded into the summary after the reply has been returned.
+    """
+
+    def __init__(self, llm: Optional[LLMService] = None, store: Optional[ChatSessionStore] = None):
+        self.llm = llm or llm_service
+        self.store = store or ChatSessionStore(
+            max_sessions=settings.CHAT_MAX_SESSIONS,
+            max_total_tokens=settings.CHAT_MAX_TOTAL_TOKENS,
+            idle_seconds=settings.CHAT_IDLE_SECONDS
+        )
+        self.window_turns = settings.CHAT_WINDOW_TURNS
+        self.session_token_cap = settings.CHAT_SESSION_TOKEN_CAP
+        self.summary_tokens = settings.CHAT_SUMMARY_TOKENS
+        self._background: set = set()
+
+    async def send_message(self, session_id: Optional[str], user: Dict[str, Any], message: str) -> Dict[str, Any]:
+        """Answer a user message within its session"""
+        session = self.store.get_or_create(session_id, user.get("id"))
+        async with session.lock:
+            prompt = self._build_prompt(session, user, message)
+            reply = await self.llm.generate_text_async(prompt)
+
+            session.turns.append({"role": "user", "content": message})
+            session.turns.append({"role": "assistant", "content": reply})
+            self._trim_window(session)
+
+        if session.pending:
+            task = asyncio.create_task(self._fold_pending(session))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+        return {
+            "session_id": session.id,
+            "response": reply,
+            "conversation_history": list(session.turns)
+        }
+
+    def _build_prompt(self, session: ChatSession, user: Dict[str, Any], message: str) -> str:
+        return templates.render(
+            "prompts/chat.txt",
+            role=user.get("role"),
+            full_name=user.get("full_name"),
+            summary=session.summary,
+            turns=session.turns,
+            message=message
+        )
+
+    def _trim_window(self, session: ChatSession) -> None:
+        """Move turns out of the window when there are too many or the session is over its cap"""
+        # Always keep the latest exchange in the window
+        while len(session.turns) > 2 and (
+            len(session.turns) > self.window_turns or session.window_tokens > self.session_token_cap
+        ):
+            session.pending.append(session.turns.pop(0))
+
+    async def _fold_pending(self, session: ChatSession) -> None:
+        """Merge turns that left the window into the session summary.
+
+        The summarization call runs outside the session lock so the next
+        message isn't held up by it; one task folds per session at a time.
+        """
+        async with session.lock:
+            if session.folding or not session.pending:
+                return
+            session.folding = True
+        try:
+            while True:
+                async with session.lock:
+                    if not session.pending:
+                        return
+                    folded, session.pending = session.pending, []
+                    previous = session.summary
+
+                transcript = "\n".join(
+                    f"{'User' if turn['role'] == 'user' else 'Assistant'}: {turn['content']}" for turn in folded
+                )
+                prompt = templates.render(
+                    "prompts/chat_summary.txt",
+                    summary=previous,
+                    transcript=transcript,
+                    words=self.summary_tokens * 3 // 4
+                )
+                try:
+                    summary = await self.llm.generate_cached_async(prompt, raise_errors=True)
+                except Exception as e:
+                    print(f"Error summarizing chat session: {e}")
+                    summary = f"{previous}\n{transcript}".strip()
+
+                async with session.lock:
+                    session.summary = truncate_to_tokens(summary, self.summary_tokens)
+        finally:
+            session.folding = False
+
+
+chat_service = ChatService()
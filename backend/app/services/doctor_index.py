@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.database import get_supabase_client
+
+# Specializations the assistant recommends most often
+KNOWN_SPECIALIZATIONS = [
+    "Cardiologist", "Dermatologist", "Neurologist", "Gastroenterologist",
+    "Orthopedic", "General Physician", "Psychiatrist", "Pediatrician"
+]
+
+
+class SpecializationIndex:
+    """In-memory index of specialization -> doctors for the assistant.
+
+    The whole doctors table is loaded with one query and matched in memory,
+    so the request path does no database round trips. Writes in
+    routes/doctors.py call `invalidate()`; stale snapshots keep being served
+    while a background refresh runs. A periodic refresh covers writes made
+    outside this process.
+    """
+
+    def __init__(self, max_age_seconds: float):
+        self.max_age_seconds = max_age_seconds
+        self._doctors_by_term: Dict[str, List[Dict[str, Any]]] = {}
+        self._loaded_at: Optional[float] = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def refresh(self) -> None:
+        """Reload all doctors and rebuild the index"""
+        self._stale = False
+        supabase = get_supabase_client()
+        response = supabase.table("doctors").select("*, users(full_name, email)").execute()
+        self._build(response.data or [])
+
+    def load(self, doctors: List[Dict[str, Any]]) -> None:
+        """Build the index from doctor rows already at hand (as returned by Supabase, with `users` joined)"""
+        self._stale = False
+        self._build(doctors)
+
+    def _build(self, doctors: List[Dict[str, Any]]) -> None:
+        terms = {term.lower(): term for term in KNOWN_SPECIALIZATIONS}
+        for doctor in doctors:
+            if doctor.get("specialization"):
+                terms.setdefault(doctor["specialization"].lower(), doctor["specialization"])
+
+        doctors_by_term = {}
+        for term in terms:
+            matches = [
+                doctor for doctor in doctors
+                if term in (doctor.get("specialization") or "").lower()
+            ]
+            if matches:
+                doctors_by_term[term] = matches
+
+        with self._lock:
+            self._doctors_by_term = doctors_by_term
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Mark the index as stale after a doctor was created or updated"""
+        self._stale = True
+
+    async def ensure_fresh(self) -> None:
+        """Load the index on first use, and refresh stale ones in the background"""
+        if self._loaded_at is None:
+            await asyncio.to_thread(self.refresh)
+            return
+
+        expired = time.monotonic() - self._loaded_at > self.max_age_seconds
+        if (self._stale or expired) and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+
+    async def _background_refresh(self) -> None:
+        try:
+            await asyncio.to_thread(self.refresh)
+        except Exception as e:
+            self._stale = True
+            print(f"Error refreshing specialization index: {e}")
+
+    def match(self, text: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """Return doctors for the specializations mentioned in text, most relevant first.
+
+        Specializations mentioned more often rank higher; ties go to the one
+        mentioned first.
+        """
+        lowered = text.lower()
+        with self._lock:
+            doctors_by_term = self._doctors_by_term
+
+        ranked = []
+        for term, doctors in doctors_by_term.items():
+            mentions = lowered.count(term)
+            if mentions:
+                ranked.append((-mentions, lowered.find(term), term))
+        ranked.sort()
+
+        result = []
+        seen = set()
+        for _, _, term in ranked:
+            for doctor in doctors_by_term[term]:
+                if doctor["id"] not in seen:
+                    seen.add(doctor["id"])
+                    result.append(doctor)
+                if len(result) >= limit:
+                    return result
+        return result
+
+
+doctor_index = SpecializationIndex(max_age_seconds=settings.DOCTOR_INDEX_MAX_AGE_SECONDS)
@@ -0,0 +1,206 @@
+import asyncio
+import random
+import threading
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db import models
+from app.db.database import SessionLocal
+from app.services.smtp_pool import SMTPConnectionPool, smtp_pool
+
+
+def build_message(sender: str, to_email: str, subject: str, body: str) -> str:
+    """Render an HTML email as the raw message string handed to SMTP"""
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = sender
+    message["To"] = to_email
+    message.attach(MIMEText(body, "html"))
+    return message.as_string()
+
+
+def send_emails(pool: SMTPConnectionPool, emails: List[Tuple[str, str, str]]) -> List[Optional[Exception]]:
+    """Send (to_email, subject, body) emails over the pool; one error or None per email.
+
+    Without SMTP credentials (development) the emails are printed instead.
+    """
+    if not settings.EMAIL_SENDER or not settings.EMAIL_PASSWORD:
+        for to_email, subject, body in emails:
+            print("\n--- EMAIL WOULD BE SENT ---")
+            print(f"To: {to_email}")
+            print(f"Subject: {subject}")
+            print(f"Body: {body}")
+            print("--- END EMAIL ---\n")
+        return [None] * len(emails)
+
+    return pool.send_many(settings.EMAIL_SENDER, [
+        (to_email, build_message(settings.EMAIL_SENDER, to_email, subject, body))
+        for to_email, subject, body in emails
+    ])
+
+
+class EmailQueue:
+    """Durable outbox for outgoing email.
+
+    Requests only insert a row into `email_outbox`; background workers claim
+    due rows in batches, send each batch over pooled SMTP connections and
+    record the outcome per email. A claimed email has its due time pushed
+    `claim_seconds` ahead, so if a worker dies mid-batch the email is picked
+    up again once the claim expires. Failed sends are retried with
+    exponential backoff until `max_attempts`, then marked failed.
+    """
+
+    def __init__(self, pool: SMTPConnectionPool, workers: int, batch_size: int, poll_seconds: float,
+                 claim_seconds: float, max_attempts: int, max_backoff_seconds: float):
+        self.pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.claim_seconds = claim_seconds
+        self.max_attempts = max_attempts
+        self.max_backoff_seconds = max_backoff_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Serializes claims between workers of this process; other processes rely on SKIP LOCKED
+        self._claim_lock = threading.Lock()
+
+    def enqueue(self, db: Session, to_email: str, subject: str, body: str) -> models.OutboxEmail:
+        """Store an email for delivery by the workers and commit it"""
+        return self.enqueue_many(db, [(to_email, subject, body)])[0]
+
+    def enqueue_many(self, db: Session, emails: List[Tuple[str, str, str]]) -> List[models.OutboxEmail]:
+        """Store (to_email, subject, body) emails in one commit"""
+        rows = [models.OutboxEmail(to_email=to_email, subject=subject, body=body) for to_email, subject, body in emails]
+        if not rows:
+            return rows
+        db.add_all(rows)
+        db.commit()
+        metrics.inc("email_queue_enqueued_total", len(rows))
+        self._wake()
+        return rows
+
+    def _wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            # enqueue may run in a worker thread (MCP tools), so hop onto the loop
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if self._tasks or SessionLocal is None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._loop = None
+        self._wakeup = None
+        await asyncio.to_thread(self.pool.close_all)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent = await asyncio.to_thread(self.process_batch)
+            except Exception as e:
+                print(f"Error processing email queue: {e}")
+                sent = 0
+            if sent:
+                # More may be due already; keep draining
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def process_batch(self) -> int:
+        """Claim and deliver one batch of due emails; returns how many were claimed"""
+        db = SessionLocal()
+        try:
+            batch = self._claim(db)
+            if batch:
+                self._deliver(db, batch)
+            self._update_depth(db)
+            return len(batch)
+        finally:
+            db.close()
+
+    def _claim(self, db: Session) -> List[models.OutboxEmail]:
+        now = datetime.utcnow()
+        with self._claim_lock:
+            batch = db.query(models.OutboxEmail)\
+                .filter(
+                    models.OutboxEmail.status == models.EmailStatus.PENDING,
+                    models.OutboxEmail.next_attempt_at <= now
+                )\
+                .order_by(models.OutboxEmail.next_attempt_at)\
+                .limit(self.batch_size)\
+                .with_for_update(skip_locked=True)\
+                .all()
+            claimed_until = now + timedelta(seconds=self.claim_seconds)
+            for email in batch:
+                email.next_attempt_at = claimed_until
+                email.attempts += 1
+            db.commit()
+        return batch
+
+    def _deliver(self, db: Session, batch: List[models.OutboxEmail]) -> None:
+        results = send_emails(self.pool, [(email.to_email, email.subject, email.body) for email in batch])
+
+        now = datetime.utcnow()
+        for email, error in zip(batch, results):
+            if error is None:
+                email.status = models.EmailStatus.SENT
+                email.sent_at = now
+                email.last_error = None
+                metrics.inc("email_queue_delivered_total", outcome="sent")
+            elif email.attempts >= self.max_attempts:
+                email.status = models.EmailStatus.FAILED
+                email.last_error = str(error)
+                metrics.inc("email_queue_delivered_total", outcome="failed")
+                print(f"Giving up on email {email.id} to {email.to_email} after {email.attempts} attempts: {error}")
+            else:
+                email.next_attempt_at = now + timedelta(seconds=self._backoff(email.attempts))
+                email.last_error = str(error)
+                metrics.inc("email_queue_delivered_total", outcome="retry")
+        db.commit()
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter, starting at 30 seconds"""
+        return min(30 * 2 ** (attempts - 1), self.max_backoff_seconds) + random.random() * 5
+
+    def _update_depth(self, db: Session) -> None:
+        metrics.set_gauge("email_queue_depth", self.depth(db))
+
+    def depth(self, db: Session) -> int:
+        """Number of emails waiting to be sent (including ones waiting for a retry)"""
+        return db.query(func.count(models.OutboxEmail.id))\
+            .filter(models.OutboxEmail.status == models.EmailStatus.PENDING)\
+            .scalar()
+
+
+email_queue = EmailQueue(
+    pool=smtp_pool,
+    workers=settings.EMAIL_QUEUE_WORKERS,
+    batch_size=settings.EMAIL_QUEUE_BATCH_SIZE,
+    poll_seconds=settings.EMAIL_QUEUE_POLL_SECONDS,
+    claim_seconds=settings.EMAIL_QUEUE_CLAIM_SECONDS,
+    max_attempts=settings.EMAIL_QUEUE_MAX_ATTEMPTS,
+    max_backoff_seconds=settings.EMAIL_QUEUE_MAX_BACKOFF_SECONDS
+)
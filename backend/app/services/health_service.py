@@ -0,0 +1,96 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.db.database import get_supabase_client
+from app.services.llm_service import llm_service
+
+
+class HealthProber:
+    """Checks dependencies in the background and serves the last result.
+
+    Probes (/readyz, /api/health) only read the cached status, so probe
+    traffic never reaches the database or Gemini. The LLM provider is checked
+    through its cheap `check()` (model metadata for Gemini, which is not
+    billed), and less often than the database.
+    """
+
+    def __init__(self, interval: float, gemini_interval: float, timeout: float):
+        self.interval = interval
+        self.gemini_interval = gemini_interval
+        self.timeout = timeout
+        self.status: Dict[str, Any] = {
+            "database": "unknown",
+            "gemini_api": "unknown",
+            "checked_at": None
+        }
+        self._last_database_ok: Optional[float] = None
+        self._last_gemini_check: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background probe loop on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                print(f"Error running health probes: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def probe_once(self) -> None:
+        """Run the dependency checks once and update the cached status"""
+        self.status["database"] = await self._check(self._check_database)
+        if self.status["database"] == "online":
+            self._last_database_ok = time.monotonic()
+
+        now = time.monotonic()
+        if self._last_gemini_check is None or now - self._last_gemini_check >= self.gemini_interval:
+            self.status["gemini_api"] = await self._check(self._check_gemini)
+            self._last_gemini_check = now
+
+        self.status["checked_at"] = datetime.utcnow().isoformat()
+
+    async def _check(self, check) -> str:
+        try:
+            await asyncio.wait_for(asyncio.to_thread(check), timeout=self.timeout)
+            return "online"
+        except asyncio.TimeoutError:
+            return "error: timed out"
+        except Exception as e:
+            return f"error: {str(e)}"
+
+    def _check_database(self) -> None:
+        supabase = get_supabase_client()
+        supabase.table("users").select("id").limit(1).execute()
+
+    def _check_gemini(self) -> None:
+        llm_service.provider.check()
+
+    @property
+    def ready(self) -> bool:
+        """Ready when the database answered within the last few probe intervals"""
+        if self._last_database_ok is None:
+            return False
+        return time.monotonic() - self._last_database_ok <= 3 * self.interval
+
+
+health_prober = HealthProber(
+    interval=settings.HEALTH_PROBE_INTERVAL_SECONDS,
+    gemini_interval=settings.HEALTH_GEMINI_PROBE_INTERVAL_SECONDS,
+    timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS
+)
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db import models
+
+# Purge expired rows once every this many stored responses
+PURGE_EVERY = 500
+
+
+class IdempotencyConflictError(Exception):
+    """The key was already used for a different request"""
+
+
+class IdempotencyInProgressError(Exception):
+    """The first request with this key has not finished yet"""
+
+
+class IdempotencyService:
+    """Replays stored responses for retried requests carrying the same Idempotency-Key.
+
+    The first request inserts a placeholder row for its key; the primary key
+    makes sure only one request (in any worker) executes. When it succeeds
+    its response is stored and every retry gets that response back without
+    running the side effects (calendar insert, confirmation email) again. If
+    it fails, the placeholder is removed so a retry executes normally.
+
+    Completed responses are also kept in a small in-process LRU so hot
+    retries don't touch the database.
+    """
+
+    def __init__(self, ttl_seconds: float, lock_seconds: float, memory_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Tuple[str, int, Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stored = 0
+
+    @staticmethod
+    def request_hash(payload: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _from_memory(self, key: str) -> Optional[Tuple[str, int, Any]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if time.time() > entry[3]:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry[:3]
+
+    def _remember(self, key: str, request_hash: str, status_code: int, body: Any) -> None:
+        with self._lock:
+            self._memory[key] = (request_hash, status_code, body, time.time() + self.ttl_seconds)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def begin(self, db: Session, scope: str, key: str, request_hash: str) -> Optional[Tuple[int, Any]]:
+        """Claim a key before executing a request.
+
+        Returns (status_code, body) to replay when the key was already
+        completed, or None when the caller should execute the request and then
+        call `complete()` (or `abandon()` on failure).
+        """
+        full_key = f"{scope}:{key}"
+        cached = self._from_memory(full_key)
+        if cached is not None:
+            return self._replay(cached, request_hash)
+
+        record = models.IdempotencyKey(key=full_key, request_hash=request_hash)
+        db.add(record)
+        try:
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+
+        existing = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == full_key).first()
+        if existing is None:
+            # Abandoned between our insert and this read
+            raise IdempotencyInProgressError("A request with this Idempotency-Key is in progress")
+
+        age = datetime.utcnow() - existing.created_at
+        expired = age > timedelta(seconds=self.ttl_seconds)
+        # A placeholder this old belongs to a request that died without abandoning it
+        orphaned = existing.status_code is None and age > timedelta(seconds=self.lock_seconds)
+        if expired or orphaned:
+            db.delete(existing)
+            db.commit()
+            return self.begin(db, scope, key, request_hash)
+
+        if existing.status_code is None:
+            if existing.request_hash != request_hash:
+                raise IdempotencyConflictError("Idempotency-Key was already used for a different request")
+            raise IdempotencyInProgressError("A request with this Idempotency-Key is in progress")
+
+        body = json.loads(existing.response) if existing.response else None
+        self._remember(full_key, existing.request_hash, existing.status_code, body)
+        return self._replay((existing.request_hash, existing.status_code, body), request_hash)
+
+    @staticmethod
+    def _replay(entry: Tuple[str, int, Any], request_hash: str) -> Tuple[int, Any]:
+        stored_hash, status_code, body = entry
+        if stored_hash != request_hash:
+            raise IdempotencyConflictError("Idempotency-Key was already used for a different request")
+        metrics.inc("idempotency_replays_total")
+        return status_code, body
+
+    def complete(self, db: Session, scope: str, key: str, request_hash: str, status_code: int, body: Any) -> None:
+        """Store the response of a request that claimed its key with `begin()`"""
+        full_key = f"{scope}:{key}"
+        db.query(models.IdempotencyKey)\
+            .filter(models.IdempotencyKey.key == full_key)\
+            .update({"status_code": status_code, "response": json.dumps(body, default=str)})
+        db.commit()
+        self._remember(full_key, request_hash, status_code, body)
+
+        self._stored += 1
+        if self._stored % PURGE_EVERY == 0:
+            self.purge_expired(db)
+
+    def abandon(self, db: Session, scope: str, key: str) -> None:
+        """Release a key whose request failed, so a retry executes again"""
+        db.rollback()
+        db.query(models.IdempotencyKey)\
+            .filter(models.IdempotencyKey.key == f"{scope}:{key}", models.IdempotencyKey.status_code.is_(None))\
+            .delete()
+        db.commit()
+
+    def purge_expired(self, db: Session) -> int:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        deleted = db.query(models.IdempotencyKey)\
+            .filter(models.IdempotencyKey.created_at < cutoff)\
+            .delete()
+        db.commit()
+        return deleted
+
+
+idempotency_service = IdempotencyService(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+    memory_entries=settings.IDEMPOTENCY_MEMORY_ENTRIES
+)
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.metrics import metrics
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class LLMResponseCache:
+    """Two-tier cache for deterministic LLM responses.
+
+    Entries live in an in-memory LRU and, when a `path` is given, in an
+    on-disk SQLite table so they survive restarts. Both tiers honour the same
+    TTL; the disk tier is trimmed to `disk_entries` rows by evicting the least
+    recently used ones. The disk tier is opt-in since responses may contain
+    patient data.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, memory_entries: int, disk_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if path:
+            try:
+                directory = os.path.dirname(os.path.abspath(path))
+                os.makedirs(directory, exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Warning: LLM disk cache disabled: {e}")
+                self._conn = None
+
+    @property
+    def has_disk(self) -> bool:
+        return self._conn is not None
+
+    @staticmethod
+    def make_key(model: str, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Hash the model name and the prompt, with whitespace runs collapsed, into a cache key.
+
+        Case is kept: prompts differing only in case can get different answers.
+        """
+        def normalize(text: Optional[str]) -> str:
+            return _WHITESPACE.sub(" ", text or "").strip()
+
+        raw = "\x00".join([model, normalize(system_prompt), normalize(prompt)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look a key up in memory first, then on disk"""
+        value = self.get_memory(key)
+        if value is None and self.has_disk:
+            value = self.get_disk(key)
+        return value
+
+    def get_memory(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] + self.ttl_seconds < now:
+                del self._memory[key]
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+
+        metrics.inc("llm_cache_requests_total", tier="memory", result="hit" if entry else "miss")
+        return entry[0] if entry else None
+
+    def get_disk(self, key: str) -> Optional[str]:
+        if not self.has_disk:
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] + self.ttl_seconds < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            elif row is not None:
+                self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+
+        metrics.inc("llm_cache_requests_total", tier="disk", result="hit" if row else "miss")
+        if row is None:
+            return None
+
+        # Promote to the memory tier, keeping the original creation time for the TTL
+        self._set_memory(key, row[0], row[1])
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response in both tiers"""
+        now = time.time()
+        self._set_memory(key, value, now)
+
+        if not self.has_disk:
+            return
+
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                self._evict_disk(now)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing LLM disk cache: {e}")
+
+    def _set_memory(self, key: str, value: str, created_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (value, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+                metrics.inc("llm_cache_evictions_total", tier="memory")
+
+    def _evict_disk(self, now: float) -> None:
+        """Drop expired rows, then the least recently used ones beyond the size limit"""
+        expired = self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        overflow = count - self.disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+        evicted = expired + max(overflow, 0)
+        if evicted:
+            metrics.inc("llm_cache_evictions_total", evicted, tier="disk")
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        with self._lock:
+            self._memory.clear()
+            if self.has_disk:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current sizes of both tiers"""
+        result = {"memory_size": len(self._memory)}
+        if self.has_disk:
+            with self._lock:
+                result["disk_size"] = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        for tier in ("memory", "disk"):
+            for outcome, label in (("hit", "hits"), ("miss", "misses")):
+                result[f"{tier}_{label}"] = metrics.get(
+                    "llm_cache_requests_total", tier=tier, result=outcome
+                )
+        return result
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Optional
+
+import google.generativeai as genai
+
+from app.core.config import settings
+
+
+class LLMProvider(ABC):
+    """Interface between LLMService and a text-generation backend.
+
+    Providers only talk to the backend; deadlines, concurrency limits,
+    caching and metrics are handled by LLMService.
+    """
+
+    model_name: str = ""
+
+    @abstractmethod
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        ...
+
+    @abstractmethod
+    async def generate_async(self, prompt: str, system_prompt: Optional[str] = None,
+                             timeout: Optional[float] = None) -> str:
+        ...
+
+    @abstractmethod
+    def stream_async(self, prompt: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        ...
+
+    @abstractmethod
+    def check(self) -> None:
+        """Cheap reachability check used by the health prober; raises on failure"""
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini through google-generativeai"""
+
+    def __init__(self, api_key: Optional[str], model_name: str = "gemini-1.5-pro"):
+        genai.configure(api_key=api_key)
+        self.api_key = api_key
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        request_options = {"timeout": timeout} if timeout else None
+        if system_prompt:
+            chat = self.model.start_chat(history=[
+                {"role": "user", "parts": [system_prompt]}
+            ])
+            response = chat.send_message(prompt, request_options=request_options)
+        else:
+            response = self.model.generate_content(prompt, request_options=request_options)
+        return response.text
+
+    async def generate_async(self, prompt: str, system_prompt: Optional[str] = None,
+                             timeout: Optional[float] = None) -> str:
+        request_options = {"timeout": timeout} if timeout else None
+        if system_prompt:
+            chat = self.model.start_chat(history=[
+                {"role": "user", "parts": [system_prompt]}
+            ])
+            response = await chat.send_message_async(prompt, request_options=request_options)
+        else:
+            response = await self.model.generate_content_async(prompt, request_options=request_options)
+        return response.text
+
+    async def stream_async(self, prompt: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        request_options = {"timeout": timeout} if timeout else None
+        response = await self.model.generate_content_async(
+            prompt, stream=True, request_options=request_options
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    def check(self) -> None:
+        if not self.api_key:
+            raise RuntimeError("GEMINI_API_KEY is not configured")
+        # Model metadata lookup: reaches the API without generating (or billing) tokens
+        genai.get_model(f"models/{self.model_name}")
+
+
+class FakeLLMError(Exception):
+    """Failure injected by FakeLLMProvider"""
+
+
+class FakeLLMProvider(LLMProvider):
+    """Deterministic local stand-in for load tests and benchmarks.
+
+    The response depends only on the prompt, so caching and coalescing behave
+    as with a real model. `latency` is the time to first token and
+    `tokens_per_second` paces the rest of the response; `failure_rate` is the
+    probability that a call raises FakeLLMError.
+    """
+
+    SPECIALIZATIONS = [
+        "Cardiologist", "Dermatologist", "Neurologist", "Gastroenterologist",
+        "Orthopedic", "General Physician", "Psychiatrist", "Pediatrician"
+    ]
+
+    def __init__(self, latency: float = 0.5, tokens_per_second: float = 50.0,
+                 failure_rate: float = 0.0, response_tokens: int = 60, seed: Optional[int] = None):
+        self.model_name = "fake-llm"
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.response_tokens = response_tokens
+        self._random = random.Random(seed)
+
+    def _tokens(self, prompt: str) -> List[str]:
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        specialization = self.SPECIALIZATIONS[digest % len(self.SPECIALIZATIONS)]
+        words = (
+            f"Based on the symptoms described, a consultation with a {specialization} is recommended. "
+            "This is not a definitive medical diagnosis; please consult your healthcare provider."
+        ).split(" ")
+        filler = [f"note{(digest >> i) % 97}" for i in range(max(self.response_tokens - len(words), 0))]
+        return [word + " " for word in words + filler]
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise FakeLLMError("Injected fake LLM failure")
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        tokens = self._tokens(f"{system_prompt or ''}{prompt}")
+        time.sleep(self.latency + len(tokens) * self._token_delay())
+        self._maybe_fail()
+        return "".join(tokens).strip()
+
+    async def generate_async(self, prompt: str, system_prompt: Optional[str] = None,
+                             timeout: Optional[float] = None) -> str:
+        tokens = self._tokens(f"{system_prompt or ''}{prompt}")
+        await asyncio.sleep(self.latency + len(tokens) * self._token_delay())
+        self._maybe_fail()
+        return "".join(tokens).strip()
+
+    async def stream_async(self, prompt: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        delay = self._token_delay()
+        for token in self._tokens(prompt):
+            if delay:
+                await asyncio.sleep(delay)
+            yield token
+
+    def check(self) -> None:
+        return None
+
+
+def get_llm_provider() -> LLMProvider:
+    """Build the provider selected by LLM_PROVIDER"""
+    if settings.LLM_PROVIDER == "fake":
+        return FakeLLMProvider(
+            latency=settings.FAKE_LLM_LATENCY_SECONDS,
+            tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+            failure_rate=settings.FAKE_LLM_FAILURE_RATE,
+            seed=settings.FAKE_LLM_SEED
+        )
+    if settings.LLM_PROVIDER == "gemini":
+        return GeminiProvider(api_key=os.getenv("GEMINI_API_KEY"), model_name="gemini-1.5-pro")
+    raise ValueError(f"Unknown LLM_PROVIDER: {settings.LLM_PROVIDER}")
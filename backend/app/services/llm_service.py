@@ -1,66 +1,363 @@
-import os
-import google.generativeai as genai
-from typing import Dict, List, Any
+import time
+import asyncio
+from typing import Dict, List, Any, Optional, AsyncIterator
 from dotenv import load_dotenv
 
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.templates import templates
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_providers import LLMProvider, get_llm_provider
+from app.services.prompt_builder import (
+    estimate_tokens, truncate_to_tokens, fit_sections, history_summaries
+)
+
 load_dotenv()
 
 class LLMService:
-    def __init__(self):
-        # Configure Google Generative AI
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
-    
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        # Gemini by default; LLM_PROVIDER=fake swaps in the local fake for load tests
+        self.provider = provider or get_llm_provider()
+        self.model_name = self.provider.model_name
+        self.timeout = settings.LLM_TIMEOUT_SECONDS
+
+        # Created lazily so it binds to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # Upstream calls currently running, by cache key, for request coalescing
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        # Cache for deterministic prompts (analyses and summaries)
+        self.cache: Optional[LLMResponseCache] = None
+        if settings.LLM_CACHE_ENABLED:
+            self.cache = LLMResponseCache(
+                path=settings.LLM_CACHE_PATH,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+                disk_entries=settings.LLM_CACHE_DISK_ENTRIES
+            )
+
     def generate_text(self, prompt: str, system_prompt: str = None) -> str:
         """Generate text using Gemini Pro"""
         try:
-            if system_prompt:
-                chat = self.model.start_chat(history=[
-                    {"role": "user", "parts": [system_prompt]}
-                ])
-                response = chat.send_message(prompt)
-            else:
-                response = self.model.generate_content(prompt)
-            return response.text
+            return self._generate(prompt, system_prompt)
+        except Exception as e:
+            print(f"Error in LLM service: {e}")
+            return f"I encountered an issue while processing your request. Error: {str(e)}"
+
+    async def generate_text_async(self, prompt: str, system_prompt: str = None) -> str:
+        """Generate text without blocking the event loop"""
+        try:
+            return await self._generate_async(prompt, system_prompt)
+        except asyncio.TimeoutError:
+            print(f"LLM request timed out after {self.timeout}s")
+            return "I encountered an issue while processing your request. Error: the request timed out"
+        except Exception as e:
+            print(f"Error in LLM service: {e}")
+            return f"I encountered an issue while processing your request. Error: {str(e)}"
+
+    def generate_cached(self, prompt: str, system_prompt: str = None) -> str:
+        """Generate text for a deterministic prompt, reusing earlier responses"""
+        if self.cache is None:
+            return self.generate_text(prompt, system_prompt)
+
+        key = self.cache.make_key(self.model_name, prompt, system_prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            text = self._generate(prompt, system_prompt)
         except Exception as e:
             print(f"Error in LLM service: {e}")
             return f"I encountered an issue while processing your request. Error: {str(e)}"
-    
+
+        self.cache.set(key, text)
+        return text
+
+    async def generate_cached_async(self, prompt: str, system_prompt: str = None,
+                                    raise_errors: bool = False) -> str:
+        """Async variant of generate_cached.
+
+        Disk lookups run in a worker thread, and concurrent callers with the
+        same normalized prompt share a single upstream call. With
+        `raise_errors` failures propagate instead of becoming an error message.
+        """
+        key = LLMResponseCache.make_key(self.model_name, prompt, system_prompt)
+        if self.cache is not None:
+            cached = self.cache.get_memory(key)
+            if cached is None and self.cache.has_disk:
+                cached = await asyncio.to_thread(self.cache.get_disk, key)
+            if cached is not None:
+                return cached
+
+        try:
+            return await self._coalesced_generate(key, prompt, system_prompt)
+        except asyncio.TimeoutError:
+            if raise_errors:
+                raise
+            print(f"LLM request timed out after {self.timeout}s")
+            return "I encountered an issue while processing your request. Error: the request timed out"
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Error in LLM service: {e}")
+            return f"I encountered an issue while processing your request. Error: {str(e)}"
+
+    async def _coalesced_generate(self, key: str, prompt: str, system_prompt: Optional[str]) -> str:
+        """Join an identical in-flight request, or start one that later callers can join"""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._generate_and_store(key, prompt, system_prompt))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish_in_flight(key, done))
+        else:
+            metrics.inc("llm_coalesced_total", model=self.model_name)
+
+        # Shielded so one caller disconnecting does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _generate_and_store(self, key: str, prompt: str, system_prompt: Optional[str]) -> str:
+        text = await self._generate_async(prompt, system_prompt)
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.set, key, text)
+        return text
+
+    def _finish_in_flight(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    async def stream_cached_async(self, prompt: str) -> AsyncIterator[str]:
+        """Yield response text as it is generated.
+
+        A cached response is yielded in one piece; a freshly streamed one is
+        stored in the cache once the stream completes.
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(self.model_name, prompt)
+            cached = self.cache.get_memory(key)
+            if cached is None and self.cache.has_disk:
+                cached = await asyncio.to_thread(self.cache.get_disk, key)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        async for chunk in self._stream_async(prompt):
+            chunks.append(chunk)
+            yield chunk
+
+        if key is not None:
+            await asyncio.to_thread(self.cache.set, key, "".join(chunks))
+
+    async def _stream_async(self, prompt: str) -> AsyncIterator[str]:
+        """Stream a provider response, enforcing the same deadline and concurrency cap as _generate_async"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            metrics.add_gauge("llm_in_flight", 1)
+            started = time.perf_counter()
+            deadline = loop.time() + self.timeout
+            chunks = self.provider.stream_async(prompt, timeout=self.timeout).__aiter__()
+            try:
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    yield chunk
+            except asyncio.TimeoutError:
+                self._record("timeout", started)
+                raise
+            except Exception:
+                self._record("error", started)
+                raise
+            finally:
+                # Release the provider's stream (and its HTTP response) on timeouts,
+                # errors and clients that stop reading, not only when it is exhausted
+                aclose = getattr(chunks, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                metrics.add_gauge("llm_in_flight", -1)
+
+        self._record("ok", started)
+
+    def _generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Call the provider synchronously, raising on failure"""
+        started = time.perf_counter()
+        try:
+            text = self.provider.generate(prompt, system_prompt, timeout=self.timeout)
+        except Exception:
+            self._record("error", started)
+            raise
+
+        self._record("ok", started)
+        return text
+
+    async def _generate_async(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Call the provider asynchronously with a deadline and a cap on in-flight requests"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+        async with self._semaphore:
+            metrics.add_gauge("llm_in_flight", 1)
+            started = time.perf_counter()
+            try:
+                text = await asyncio.wait_for(
+                    self.provider.generate_async(prompt, system_prompt, timeout=self.timeout),
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                self._record("timeout", started)
+                raise
+            except Exception:
+                self._record("error", started)
+                raise
+            finally:
+                metrics.add_gauge("llm_in_flight", -1)
+
+        self._record("ok", started)
+        return text
+
+    def _record(self, outcome: str, started: float) -> None:
+        """Record the outcome and latency of an upstream LLM call"""
+        metrics.inc("llm_requests_total", model=self.model_name, outcome=outcome)
+        metrics.observe("llm_request_seconds", time.perf_counter() - started, model=self.model_name)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Summarize LLM call counters for monitoring"""
+        return {
+            "in_flight": metrics.get("llm_in_flight"),
+            "max_concurrency": settings.LLM_MAX_CONCURRENCY,
+            "timeout_seconds": self.timeout,
+            "requests": {
+                outcome: metrics.get("llm_requests_total", model=self.model_name, outcome=outcome)
+                for outcome in ("ok", "error", "timeout")
+            },
+            "coalesced": metrics.get("llm_coalesced_total", model=self.model_name),
+            "cache": self.cache.stats() if self.cache else None
+        }
+
     def analyze_medical_data(self, data: Dict[str, Any]) -> str:
         """Analyze medical data and generate insights"""
-        prompt = f"""
-        Please analyze the following medical information and provide insights:
-        
-        Patient Information: {data.get('patient_info', 'N/A')}
-        Medical History: {data.get('medical_history', 'N/A')}
-        Recent Symptoms: {data.get('symptoms', 'N/A')}
-        Recent Test Results: {data.get('test_results', 'N/A')}
-        
-        Provide a thoughtful analysis including possible conditions, recommended next steps, 
-        and any important health considerations. Remember to mention this is not a definitive 
-        medical diagnosis and the patient should consult with their healthcare provider.
-        """
-        
-        return self.generate_text(prompt)
-    
+        if self._history_needs_compaction(data):
+            data = {**data, "medical_history": self._compact_history(data["medical_history"])}
+        return self.generate_cached(self._medical_analysis_prompt(self._fit_to_budget(data)))
+
+    async def analyze_medical_data_async(self, data: Dict[str, Any]) -> str:
+        """Analyze medical data without blocking the event loop"""
+        data = await self._prepare_medical_data_async(data)
+        return await self.generate_cached_async(self._medical_analysis_prompt(data))
+
+    async def stream_medical_analysis_async(self, data: Dict[str, Any]) -> AsyncIterator[str]:
+        """Stream the medical analysis as it is generated"""
+        data = await self._prepare_medical_data_async(data)
+        async for chunk in self.stream_cached_async(self._medical_analysis_prompt(data)):
+            yield chunk
+
+    async def _prepare_medical_data_async(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if self._history_needs_compaction(data):
+            data = {**data, "medical_history": await self._compact_history_async(data["medical_history"])}
+        return self._fit_to_budget(data)
+
+    def _variable_sections(self, data: Dict[str, Any]) -> Dict[str, str]:
+        """Free-text fields that may be shortened to fit the prompt budget"""
+        return {
+            name: data[name] for name in ("medical_history", "test_results")
+            if isinstance(data.get(name), str)
+        }
+
+    def _section_budget(self, data: Dict[str, Any]) -> int:
+        """Tokens left for the variable sections once the rest of the prompt is counted"""
+        fixed = {**data, **{name: "" for name in self._variable_sections(data)}}
+        return settings.LLM_PROMPT_TOKEN_BUDGET - estimate_tokens(self._medical_analysis_prompt(fixed))
+
+    def _history_needs_compaction(self, data: Dict[str, Any]) -> bool:
+        """Compact the history when the prompt would overflow and the history is longer than its summary"""
+        sections = self._variable_sections(data)
+        history_tokens = estimate_tokens(sections.get("medical_history"))
+        overflowing = sum(estimate_tokens(text) for text in sections.values()) > self._section_budget(data)
+        return overflowing and history_tokens > settings.LLM_HISTORY_SUMMARY_TOKENS
+
+    def _fit_to_budget(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Truncate whatever still overflows the budget after compaction"""
+        sections = self._variable_sections(data)
+        if not sections:
+            return data
+        return {**data, **fit_sections(sections, self._section_budget(data))}
+
+    def _compact_history(self, history: str) -> str:
+        """Summarize a long medical history once per distinct text; truncate if the LLM is unavailable"""
+        summary = history_summaries.get(history)
+        if summary is not None:
+            return summary
+
+        prompt = self._history_compaction_prompt(history)
+        key = LLMResponseCache.make_key(self.model_name, prompt)
+        summary = self.cache.get(key) if self.cache else None
+        if summary is None:
+            try:
+                summary = self._generate(prompt)
+            except Exception as e:
+                print(f"Error compacting medical history: {e}")
+                return truncate_to_tokens(history, settings.LLM_HISTORY_SUMMARY_TOKENS)
+            if self.cache is not None:
+                self.cache.set(key, summary)
+
+        history_summaries.set(history, summary)
+        return summary
+
+    async def _compact_history_async(self, history: str) -> str:
+        """Async variant of _compact_history; concurrent requests share one summarization call"""
+        summary = history_summaries.get(history)
+        if summary is not None:
+            return summary
+
+        prompt = self._history_compaction_prompt(history)
+        key = LLMResponseCache.make_key(self.model_name, prompt)
+        summary = None
+        if self.cache is not None:
+            summary = self.cache.get_memory(key)
+            if summary is None and self.cache.has_disk:
+                summary = await asyncio.to_thread(self.cache.get_disk, key)
+        if summary is None:
+            try:
+                summary = await self._coalesced_generate(key, prompt, None)
+            except Exception as e:
+                print(f"Error compacting medical history: {e}")
+                return truncate_to_tokens(history, settings.LLM_HISTORY_SUMMARY_TOKENS)
+
+        history_summaries.set(history, summary)
+        return summary
+
     def generate_appointment_summary(self, appointment_data: Dict[str, Any]) -> str:
         """Generate a summary for an appointment"""
-        prompt = f"""
-        Please create a concise appointment summary based on the following information:
-        
-        Doctor: {appointment_data.get('doctor_name', 'N/A')}
-        Specialty: {appointment_data.get('specialization', 'N/A')}
-        Patient: {appointment_data.get('patient_name', 'N/A')}
-        Date & Time: {appointment_data.get('date_time', 'N/A')}
-        Reason for Visit: {appointment_data.get('reason', 'N/A')}
-        Diagnosis: {appointment_data.get('diagnosis', 'N/A')}
-        Treatment: {appointment_data.get('treatment', 'N/A')}
-        Follow-up: {appointment_data.get('follow_up', 'N/A')}
-        
-        Create a professional and clear summary that the patient can easily understand.
-        """
-        
-        return self.generate_text(prompt)
+        return self.generate_cached(self._appointment_summary_prompt(appointment_data))
+
+    async def generate_appointment_summary_async(self, appointment_data: Dict[str, Any],
+                                                 raise_errors: bool = False) -> str:
+        """Generate an appointment summary without blocking the event loop"""
+        return await self.generate_cached_async(
+            self._appointment_summary_prompt(appointment_data), raise_errors=raise_errors
+        )
+
+    def _medical_analysis_prompt(self, data: Dict[str, Any]) -> str:
+        return templates.render("prompts/medical_analysis.txt", **data)
+
+    def _history_compaction_prompt(self, history: str) -> str:
+        words = settings.LLM_HISTORY_SUMMARY_TOKENS * 3 // 4
+        return templates.render("prompts/history_compaction.txt", history=history, words=words)
+
+    def _appointment_summary_prompt(self, appointment_data: Dict[str, Any]) -> str:
+        return templates.render("prompts/appointment_summary.txt", **appointment_data)
 
-llm_service = LLMService()
\ No newline at end of file
+llm_service = LLMService()
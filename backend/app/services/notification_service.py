@@ -1,11 +1,11 @@
 from sqlalchemy.orm import Session
-import requests
 from datetime import datetime
-import json
 
 from app.db import models
 from app.schemas import report as report_schemas
 from app.core.config import settings
+from app.core.templates import templates
+from app.services.slack_dispatcher import slack_dispatcher
 
 class NotificationService:
     def send_report_notification(
@@ -14,7 +14,12 @@ class NotificationService:
         doctor_id: int,
         report: report_schemas.DoctorReport
     ) -> bool:
-        """Send a notification with a doctor report."""
+        """Send a notification with a doctor report.
+        
+        Returns True once the notification is queued; Slack delivery happens
+        later in the background and its failures only show in the logs and
+        the slack_messages_total metric.
+        """
         try:
             # Get doctor information
             doctor = db.query(models.Doctor).join(models.User).filter(
@@ -27,9 +32,10 @@ class NotificationService:
             # Format notification message
             message = self._format_report_notification(doctor.user.full_name, report)
             
-            # Send notification via Slack or other service
+            # Queue notification for Slack; sent (and coalesced) in the background
             if settings.SLACK_WEBHOOK_URL:
-                return self._send_slack_notification(message)
+                slack_dispatcher.submit(message)
+                return True
             else:
                 # Fallback to console for development
                 print("\n--- NOTIFICATION WOULD BE SENT ---")
@@ -57,45 +63,11 @@ class NotificationService:
             last_date = max(day.date for day in report.daily_breakdown)
             date_range = f"{first_date.strftime('%b %d')} to {last_date.strftime('%b %d, %Y')}"
         
-        # Build message
-        message = f"*Doctor Report for Dr. {doctor_name}*\n"
-        message += f"*Period:* {date_range}\n\n"
-        
-        # Appointment stats
-        message += "*Appointment Summary:*\n"
-        message += f"• Total: {stats.total}\n"
-        message += f"• Completed: {stats.completed}\n"
-        message += f"• Scheduled: {stats.scheduled}\n"
-        message += f"• Cancelled: {stats.cancelled}\n\n"
-        
-        # Common conditions
-        if report.common_conditions and len(report.common_conditions) > 0:
-            message += "*Top Conditions:*\n"
-            for condition in report.common_conditions[:3]:  # Show top 3
-                message += f"• {condition.condition.title()}: {condition.count}\n"
-            message += "\n"
-        
-        # Add summary
-        message += "*Summary:*\n"
-        message += report.summary
-        
-        return message
-    
-    def _send_slack_notification(self, message: str) -> bool:
-        """Send a notification via Slack webhook."""
-        try:
-            payload = {
-                "text": message
-            }
-            
-            response = requests.post(
-                settings.SLACK_WEBHOOK_URL,
-                data=json.dumps(payload),
-                headers={"Content-Type": "application/json"}
-            )
-            
-            return response.status_code == 200
-            
-        except Exception as e:
-            print(f"Error sending Slack notification: {e}")
-            return False
\ No newline at end of file
+        return templates.render(
+            "slack/doctor_report.txt",
+            doctor_name=doctor_name,
+            date_range=date_range,
+            stats=stats,
+            conditions=(report.common_conditions or [])[:3],  # Show top 3
+            summary=report.summary
+        )
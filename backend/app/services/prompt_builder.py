@@ -0,0 +1,91 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+# Rough average for English text with Gemini/GPT-style tokenizers
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[...]\n"
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the number of tokens in a piece of text"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: Optional[str], max_tokens: int) -> str:
+    """Cut text down to roughly max_tokens, keeping its beginning and its most recent end"""
+    if not text or estimate_tokens(text) <= max_tokens:
+        return text or ""
+    if max_tokens <= 0:
+        return ""
+
+    max_chars = max(max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER), 0)
+    head = max_chars // 3
+    tail = max_chars - head
+    return text[:head] + TRUNCATION_MARKER + (text[-tail:] if tail else "")
+
+
+def fit_sections(sections: Dict[str, str], budget_tokens: int) -> Dict[str, str]:
+    """Shrink variable-length prompt sections so that together they fit the budget.
+
+    Sections smaller than an even share of the budget are kept whole and
+    their unused share goes to the larger ones, which are truncated.
+    """
+    sizes = {name: estimate_tokens(text) for name, text in sections.items()}
+    if sum(sizes.values()) <= budget_tokens:
+        return dict(sections)
+
+    result = {}
+    remaining_budget = max(budget_tokens, 0)
+    pending = sorted(sections, key=lambda name: sizes[name])
+    while pending:
+        share = remaining_budget // len(pending)
+        name = pending.pop(0)
+        if sizes[name] <= share:
+            result[name] = sections[name]
+            remaining_budget -= sizes[name]
+        else:
+            result[name] = truncate_to_tokens(sections[name], share)
+            remaining_budget -= share
+    return result
+
+
+class HistorySummaryCache:
+    """Compacted medical histories, keyed by a hash of the history text.
+
+    The assistant endpoints receive the history as free text, so the same
+    history sent again reuses its summary and an edited one simply misses.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(history: str) -> str:
+        return hashlib.sha256(history.encode("utf-8")).hexdigest()
+
+    def get(self, history: str) -> Optional[str]:
+        key = self._key(history)
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+            return summary
+
+    def set(self, history: str, summary: str) -> None:
+        key = self._key(history)
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+history_summaries = HistorySummaryCache(max_entries=settings.LLM_HISTORY_CACHE_ENTRIES)
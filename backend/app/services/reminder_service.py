@@ -0,0 +1,132 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload
+
+from app.db import models
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.templates import templates
+from app.services.email_queue import send_emails
+from app.services.smtp_pool import SMTPConnectionPool, smtp_pool
+
+
+class AppointmentReminderService:
+    """Emails patients a reminder of tomorrow's appointments.
+
+    Scheduled appointments of the day are read in (appointment_time, id)
+    order, `chunk_size` at a time, using the (appointment_time, status)
+    index and a keyset cursor instead of OFFSET. Each chunk is rendered in
+    bulk and sent in batches over pooled SMTP connections, at most
+    `concurrency` batches at once. `reminder_sent_at` is set for delivered
+    reminders and the chunk is committed and released from the session
+    before the next one is read, so memory stays flat however many
+    appointments there are and a re-run only sends what is still missing.
+    """
+
+    def __init__(self, pool: Optional[SMTPConnectionPool] = None, concurrency: int = None,
+                 chunk_size: int = None, batch_size: int = None):
+        self.pool = pool or smtp_pool
+        self.concurrency = concurrency or settings.REMINDER_JOB_CONCURRENCY
+        self.chunk_size = chunk_size or settings.REMINDER_JOB_CHUNK_SIZE
+        self.batch_size = batch_size or settings.REMINDER_JOB_BATCH_SIZE
+
+    def _next_chunk(self, db: Session, day_start: datetime, day_end: datetime,
+                    after: Optional[Tuple[datetime, int]]) -> List[models.Appointment]:
+        query = db.query(models.Appointment)\
+            .options(
+                joinedload(models.Appointment.doctor).joinedload(models.Doctor.user),
+                joinedload(models.Appointment.patient).joinedload(models.Patient.user)
+            )\
+            .filter(
+                models.Appointment.appointment_time >= day_start,
+                models.Appointment.appointment_time < day_end,
+                models.Appointment.status == models.AppointmentStatus.SCHEDULED,
+                models.Appointment.reminder_sent_at.is_(None)
+            )
+        if after is not None:
+            after_time, after_id = after
+            query = query.filter(or_(
+                models.Appointment.appointment_time > after_time,
+                and_(models.Appointment.appointment_time == after_time, models.Appointment.id > after_id)
+            ))
+        return query.order_by(models.Appointment.appointment_time, models.Appointment.id)\
+            .limit(self.chunk_size)\
+            .all()
+
+    @staticmethod
+    def _reminder_context(appointment: models.Appointment) -> Dict[str, Any]:
+        return {
+            "doctor_name": appointment.doctor.user.full_name,
+            "patient_name": appointment.patient.user.full_name,
+            "appointment_time": appointment.appointment_time,
+            "end_time": appointment.end_time,
+            "reason": appointment.reason
+        }
+
+    async def _send_batch(self, semaphore: asyncio.Semaphore,
+                          emails: List[Tuple[str, str, str]]) -> List[Optional[Exception]]:
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(send_emails, self.pool, emails)
+            except Exception as e:
+                return [e] * len(emails)
+
+    async def run(self, db: Session, day: Optional[date] = None, limit: Optional[int] = None) -> Dict[str, int]:
+        """Send reminders for appointments on `day` (tomorrow by default); returns counts"""
+        day = day or (datetime.utcnow().date() + timedelta(days=1))
+        day_start = datetime.combine(day, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = {"processed": 0, "sent": 0, "failed": 0, "skipped": 0}
+        cursor = None
+
+        while limit is None or stats["processed"] < limit:
+            chunk = await asyncio.to_thread(self._next_chunk, db, day_start, day_end, cursor)
+            if limit is not None:
+                chunk = chunk[:limit - stats["processed"]]
+            if not chunk:
+                break
+
+            # Appointments whose doctor or patient record is gone can't be addressed
+            deliverable = [a for a in chunk if a.doctor is not None and a.patient is not None]
+            stats["skipped"] += len(chunk) - len(deliverable)
+
+            contexts = [self._reminder_context(appointment) for appointment in deliverable]
+            subjects = templates.render_many("emails/appointment_reminder_subject.txt", contexts)
+            bodies = templates.render_many("emails/appointment_reminder.html", contexts)
+            emails = [
+                (appointment.patient.user.email, subject, body)
+                for appointment, subject, body in zip(deliverable, subjects, bodies)
+            ]
+
+            batches = [emails[i:i + self.batch_size] for i in range(0, len(emails), self.batch_size)]
+            results = await asyncio.gather(*(self._send_batch(semaphore, batch) for batch in batches))
+            errors = [error for batch_errors in results for error in batch_errors]
+
+            now = datetime.utcnow()
+            for appointment, error in zip(deliverable, errors):
+                if error is None:
+                    appointment.reminder_sent_at = now
+                    stats["sent"] += 1
+                    metrics.inc("appointment_reminders_total", outcome="sent")
+                else:
+                    # reminder_sent_at stays NULL, so the next run retries it
+                    print(f"Error sending reminder for appointment {appointment.id}: {error}")
+                    stats["failed"] += 1
+                    metrics.inc("appointment_reminders_total", outcome="failed")
+
+            cursor = (chunk[-1].appointment_time, chunk[-1].id)
+            stats["processed"] += len(chunk)
+            await asyncio.to_thread(db.commit)
+            # Drop the chunk's rows from the session so memory doesn't grow with the run
+            db.expunge_all()
+
+            print(f"Sent {stats['sent']} reminders ({stats['failed']} failed) so far")
+
+        return stats
+
+
+appointment_reminder_service = AppointmentReminderService()
@@ -0,0 +1,179 @@
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+COALESCED_SEPARATOR = "\n\n"
+
+
+class SlackDispatcher:
+    """Sends Slack webhook messages from a background thread.
+
+    `submit` only queues the message. Messages for the same webhook (one
+    webhook posts to one channel) that arrive within `coalesce_seconds` of
+    the first are joined into a single post, split only when the result
+    would exceed `max_message_chars`. Posts go through one persistent HTTP
+    session with a timeout; 429 responses are retried after Retry-After,
+    other failures with exponential backoff, up to `max_retries` times.
+
+    `close(timeout)` keeps sending what is queued, but caps request timeouts
+    and retry waits by what is left of `timeout`; whatever could not be sent
+    by then is logged as a count.
+    """
+
+    def __init__(self, timeout: float, max_retries: int, max_backoff: float,
+                 coalesce_seconds: float, max_message_chars: int):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.coalesce_seconds = coalesce_seconds
+        self.max_message_chars = max_message_chars
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        self.session.headers.update({"Content-Type": "application/json"})
+        # Webhook URL -> (deadline, queued messages)
+        self._pending: Dict[str, tuple] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Set by close(); monotonic time by which sending must stop
+        self._deadline: Optional[float] = None
+        # Interrupts retry waits when close() is called
+        self._closing = threading.Event()
+        # Messages given up on while closing
+        self._unsent = 0
+
+    def submit(self, message: str, webhook_url: Optional[str] = None) -> None:
+        """Queue a message for the webhook (SLACK_WEBHOOK_URL by default)"""
+        webhook_url = webhook_url or settings.SLACK_WEBHOOK_URL
+        with self._condition:
+            if webhook_url in self._pending:
+                self._pending[webhook_url][1].append(message)
+                metrics.inc("slack_messages_coalesced_total")
+            else:
+                self._pending[webhook_url] = (time.monotonic() + self.coalesce_seconds, [message])
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slack-dispatcher", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                due = self._take_due()
+                while not due and not self._closed:
+                    deadlines = [deadline for deadline, _ in self._pending.values()]
+                    timeout = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+                    self._condition.wait(timeout)
+                    due = self._take_due()
+                if not due and self._closed:
+                    return
+            for webhook_url, messages in due:
+                for text, count in self._coalesce(messages):
+                    if not self.post(webhook_url, text) and self._closed:
+                        self._unsent += count
+
+    def _take_due(self) -> List[tuple]:
+        now = time.monotonic()
+        due = [
+            (webhook_url, messages) for webhook_url, (deadline, messages) in self._pending.items()
+            if deadline <= now or self._closed
+        ]
+        for webhook_url, _ in due:
+            del self._pending[webhook_url]
+        return due
+
+    def _coalesce(self, messages: List[str]) -> List[Tuple[str, int]]:
+        """Join messages into as few posts as fit the size limit; (text, number of messages) per post"""
+        posts: List[Tuple[str, int]] = []
+        for message in messages:
+            if posts and len(posts[-1][0]) + len(COALESCED_SEPARATOR) + len(message) <= self.max_message_chars:
+                posts[-1] = (posts[-1][0] + COALESCED_SEPARATOR + message, posts[-1][1] + 1)
+            else:
+                posts.append((message, 1))
+        return posts
+
+    def _within_deadline(self, seconds: float) -> float:
+        """Cap a wait by the time left before the close() deadline"""
+        if self._deadline is None:
+            return seconds
+        return min(seconds, self._deadline - time.monotonic())
+
+    def post(self, webhook_url: str, text: str) -> bool:
+        """Post one message now, retrying rate limits and transient failures"""
+        error = "dispatcher closed"
+        for attempt in range(self.max_retries + 1):
+            request_timeout = self._within_deadline(self.timeout)
+            if request_timeout <= 0:
+                break
+            delay = min(2 ** attempt, self.max_backoff) + random.random()
+            try:
+                response = self.session.post(webhook_url, json={"text": text}, timeout=request_timeout)
+                if response.status_code == 200:
+                    metrics.inc("slack_messages_total", outcome="sent")
+                    return True
+                if response.status_code == 429:
+                    metrics.inc("slack_rate_limited_total")
+                    delay = self._retry_after(response, delay)
+                elif response.status_code < 500:
+                    # Bad payload or revoked webhook; retrying won't help
+                    print(f"Slack rejected notification: {response.status_code} {response.text}")
+                    break
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+            if attempt < self.max_retries and not self._wait_to_retry(delay):
+                print(f"Error sending Slack notification before shutdown: {error}")
+                break
+        else:
+            print(f"Error sending Slack notification after {self.max_retries + 1} attempts: {error}")
+        metrics.inc("slack_messages_total", outcome="failed")
+        return False
+
+    def _wait_to_retry(self, delay: float) -> bool:
+        """Sleep before a retry; False if close() leaves no time for it"""
+        retry_at = time.monotonic() + delay
+        if self._closing.wait(delay):
+            # Closing, possibly in the middle of the wait
+            if retry_at > self._deadline:
+                return False
+            time.sleep(max(retry_at - time.monotonic(), 0))
+        return True
+
+    @staticmethod
+    def _retry_after(response: requests.Response, default: float) -> float:
+        try:
+            return float(response.headers.get("Retry-After", default))
+        except ValueError:
+            return default
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Send whatever is still queued within `timeout` seconds and stop the thread"""
+        with self._condition:
+            self._closed = True
+            self._deadline = time.monotonic() + timeout
+            self._closing.set()
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._condition:
+            unsent = self._unsent + sum(len(messages) for _, messages in self._pending.values())
+        if unsent:
+            print(f"Slack dispatcher closed with {unsent} notifications not sent")
+        self.session.close()
+
+
+slack_dispatcher = SlackDispatcher(
+    timeout=settings.SLACK_TIMEOUT_SECONDS,
+    max_retries=settings.SLACK_MAX_RETRIES,
+    max_backoff=settings.SLACK_MAX_BACKOFF_SECONDS,
+    coalesce_seconds=settings.SLACK_COALESCE_SECONDS,
+    max_message_chars=settings.SLACK_MAX_MESSAGE_CHARS
+)
@@ -0,0 +1,188 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.etag import versions
+from app.core.metrics import metrics
+from app.db.overlap import find_overlapping_appointment
+
+
+class SlotUnavailableError(Exception):
+    """The slot overlaps a hold of another patient"""
+
+
+class HoldNotFoundError(Exception):
+    """The hold does not exist or has expired"""
+
+
+class SlotHold:
+    def __init__(self, doctor_id: int, patient_id: int, start: datetime, end: datetime, ttl_seconds: float):
+        self.id = uuid.uuid4().hex
+        self.doctor_id = doctor_id
+        self.patient_id = patient_id
+        self.start = start
+        self.end = end
+        self.expires_at = time.time() + ttl_seconds
+        self.confirming = False
+
+    @property
+    def expired(self) -> bool:
+        return not self.confirming and time.time() > self.expires_at
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        return self.start < end and start < self.end
+
+    def to_dict(self) -> Dict:
+        return {
+            "hold_id": self.id,
+            "doctor_id": self.doctor_id,
+            "patient_id": self.patient_id,
+            "appointment_time": self.start,
+            "end_time": self.end,
+            "expires_at": datetime.fromtimestamp(self.expires_at)
+        }
+
+
+class SlotHoldService:
+    """Short-lived reservations of appointment slots, kept in memory.
+
+    A booking flow holds a slot, then confirms (books) or releases it. Only
+    holds of the same doctor are compared, under that doctor's own lock, so
+    flows for different doctors never wait on each other. Expired holds are
+    dropped lazily whenever the doctor's holds are looked at.
+
+    Holds are per process; running several workers needs the database-level
+    overlap check as the final guard.
+    """
+
+    def __init__(self, ttl_seconds: float, max_ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_ttl_seconds = max_ttl_seconds
+        self._holds: Dict[str, SlotHold] = {}
+        self._by_doctor: Dict[int, Dict[str, SlotHold]] = {}
+        self._doctor_locks: Dict[int, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def _lock_for(self, doctor_id: int) -> threading.Lock:
+        with self._registry_lock:
+            lock = self._doctor_locks.get(doctor_id)
+            if lock is None:
+                lock = self._doctor_locks[doctor_id] = threading.Lock()
+                self._by_doctor[doctor_id] = {}
+            return lock
+
+    def _purge_expired(self, doctor_id: int) -> None:
+        holds = self._by_doctor[doctor_id]
+        expired = [hold_id for hold_id, hold in holds.items() if hold.expired]
+        for hold_id in expired:
+            del holds[hold_id]
+            self._holds.pop(hold_id, None)
+            metrics.inc("slot_holds_total", outcome="expired")
+        if expired:
+            self._changed(doctor_id)
+
+    @staticmethod
+    def _changed(doctor_id: int) -> None:
+        # Cached MCP availability results of the doctor are stale once a hold comes or goes
+        versions.bump_local(("doctor_appointments", doctor_id))
+
+    def _conflict(self, doctor_id: int, start: datetime, end: datetime, patient_id: int,
+                  ignore_hold_id: Optional[str] = None) -> Optional[SlotHold]:
+        for hold in self._by_doctor[doctor_id].values():
+            if hold.id != ignore_hold_id and hold.patient_id != patient_id and hold.overlaps(start, end):
+                return hold
+        return None
+
+    def hold(self, doctor_id: int, patient_id: int, start: datetime, end: datetime,
+             ttl_seconds: Optional[float] = None) -> SlotHold:
+        """Reserve a slot for a patient; raises SlotUnavailableError if someone else holds it"""
+        ttl = max(1, min(ttl_seconds or self.ttl_seconds, self.max_ttl_seconds))
+        with self._lock_for(doctor_id):
+            self._purge_expired(doctor_id)
+            if self._conflict(doctor_id, start, end, patient_id):
+                metrics.inc("slot_holds_total", outcome="conflict")
+                raise SlotUnavailableError("This slot is being booked by someone else")
+            hold = SlotHold(doctor_id, patient_id, start, end, ttl)
+            self._by_doctor[doctor_id][hold.id] = hold
+            self._holds[hold.id] = hold
+        self._changed(doctor_id)
+        metrics.inc("slot_holds_total", outcome="held")
+        return hold
+
+    def hold_available(self, db: Session, doctor_id: int, patient_id: int, start: datetime, end: datetime,
+                       ttl_seconds: Optional[float] = None) -> SlotHold:
+        """Hold a slot after checking it is well formed and not already booked.
+
+        Raises ValueError for an empty or inverted slot and SlotUnavailableError
+        if it overlaps an appointment or another patient's hold.
+        """
+        if end <= start:
+            raise ValueError("end_time must be after appointment_time")
+        if find_overlapping_appointment(db, doctor_id, start, end):
+            metrics.inc("slot_holds_total", outcome="conflict")
+            raise SlotUnavailableError("This slot is already booked")
+        return self.hold(doctor_id, patient_id, start, end, ttl_seconds)
+
+    def get(self, hold_id: str) -> SlotHold:
+        hold = self._holds.get(hold_id)
+        if hold is None or hold.expired:
+            raise HoldNotFoundError("Slot hold not found or expired")
+        return hold
+
+    def check_free(self, doctor_id: int, start: datetime, end: datetime, patient_id: int) -> None:
+        """Raise SlotUnavailableError if another patient holds an overlapping slot"""
+        with self._lock_for(doctor_id):
+            self._purge_expired(doctor_id)
+            if self._conflict(doctor_id, start, end, patient_id):
+                metrics.inc("slot_holds_total", outcome="conflict")
+                raise SlotUnavailableError("This slot is being booked by someone else")
+
+    @contextmanager
+    def confirming(self, hold_id: str) -> Iterator[SlotHold]:
+        """Keep a hold alive while its appointment is created.
+
+        The hold is removed when the block succeeds; if it raises, the hold
+        stays (with its original expiry) so the booking can be retried.
+        """
+        hold = self.get(hold_id)
+        with self._lock_for(hold.doctor_id):
+            if hold.confirming or hold.expired or hold_id not in self._holds:
+                raise HoldNotFoundError("Slot hold not found or expired")
+            hold.confirming = True
+        try:
+            yield hold
+        except BaseException:
+            hold.confirming = False
+            raise
+        self._remove(hold)
+        metrics.inc("slot_holds_total", outcome="confirmed")
+
+    def release(self, hold_id: str) -> None:
+        """Give a held slot back"""
+        hold = self.get(hold_id)
+        with self._lock_for(hold.doctor_id):
+            if hold.confirming:
+                raise HoldNotFoundError("Slot hold is being confirmed")
+            self._discard(hold)
+        self._changed(hold.doctor_id)
+        metrics.inc("slot_holds_total", outcome="released")
+
+    def _remove(self, hold: SlotHold) -> None:
+        with self._lock_for(hold.doctor_id):
+            self._discard(hold)
+
+    def _discard(self, hold: SlotHold) -> None:
+        self._by_doctor[hold.doctor_id].pop(hold.id, None)
+        self._holds.pop(hold.id, None)
+
+
+slot_holds = SlotHoldService(
+    ttl_seconds=settings.SLOT_HOLD_TTL_SECONDS,
+    max_ttl_seconds=settings.SLOT_HOLD_MAX_TTL_SECONDS
+)
@@ -0,0 +1,180 @@
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Errors about one message; anything else drops the connection
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+
+class SMTPConnectionPool:
+    """Bounded pool of connected, authenticated SMTP sessions.
+
+    STARTTLS and login happen once per connection instead of once per email.
+    A connection idle for longer than `health_check_after` seconds is checked
+    with NOOP before reuse, and connections are retired after
+    `max_messages_per_connection` messages since many servers cap that. A
+    message that fails because the connection dropped is retried once on a
+    new connection.
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = True, max_size: int = 4, timeout: float = 10.0,
+                 health_check_after: float = 30.0, max_messages_per_connection: int = 100):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.max_messages_per_connection = max_messages_per_connection
+        self._idle: List[PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _connect(self) -> PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        metrics.inc("smtp_connections_opened_total")
+        return PooledConnection(smtp)
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _healthy(self, connection: PooledConnection) -> bool:
+        if time.monotonic() - connection.last_used < self.health_check_after:
+            return True
+        try:
+            return connection.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _take_idle(self) -> Optional[PooledConnection]:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                # Most recently used first; the oldest ones time out and get dropped
+                connection = self._idle.pop()
+                metrics.set_gauge("smtp_pool_idle", len(self._idle))
+            if self._healthy(connection):
+                return connection
+            metrics.inc("smtp_connections_discarded_total", reason="unhealthy")
+            self._close(connection.smtp)
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledConnection]:
+        """Borrow a connection; it is discarded if the block raises"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("No SMTP connection available")
+        try:
+            connection = self._take_idle() or self._connect()
+            try:
+                yield connection
+            except Exception:
+                metrics.inc("smtp_connections_discarded_total", reason="error")
+                self._close(connection.smtp)
+                raise
+            connection.last_used = time.monotonic()
+            if connection.messages_sent >= self.max_messages_per_connection:
+                self._close(connection.smtp)
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+                    metrics.set_gauge("smtp_pool_idle", len(self._idle))
+        finally:
+            self._slots.release()
+
+    def send(self, sender: str, recipient: str, message: str) -> None:
+        """Send one message over a pooled connection; raises on failure like smtplib"""
+        error = self.send_many(sender, [(recipient, message)])[0]
+        if error is not None:
+            raise error
+
+    def send_many(self, sender: str, messages: List[Tuple[str, str]]) -> List[Optional[Exception]]:
+        """Send (recipient, message) pairs, reusing connections across messages.
+
+        Returns one entry per message: None when the server accepted it,
+        otherwise the error. A message is retried once on a new connection
+        when its connection fails.
+        """
+        results: List[Optional[Exception]] = [None] * len(messages)
+        index = 0
+        attempts = 0
+        while index < len(messages):
+            try:
+                with self.connection() as connection:
+                    while index < len(messages):
+                        recipient, message = messages[index]
+                        started = time.perf_counter()
+                        try:
+                            connection.smtp.sendmail(sender, recipient, message)
+                            metrics.observe("smtp_send_seconds", time.perf_counter() - started)
+                            metrics.inc("smtp_messages_total", outcome="sent")
+                        except MESSAGE_ERRORS as e:
+                            # Rejected message; the connection is still usable
+                            results[index] = e
+                            metrics.inc("smtp_messages_total", outcome="rejected")
+                        index += 1
+                        attempts = 0
+                        connection.messages_sent += 1
+                        if connection.messages_sent >= self.max_messages_per_connection:
+                            break
+            except Exception as e:
+                attempts += 1
+                if attempts > 1:
+                    # Failed on a fresh connection too; give up on this message
+                    results[index] = e
+                    metrics.inc("smtp_messages_total", outcome="failed")
+                    index += 1
+                    attempts = 0
+        return results
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection.smtp)
+
+
+smtp_pool = SMTPConnectionPool(
+    host=settings.SMTP_SERVER,
+    port=settings.SMTP_PORT,
+    username=settings.EMAIL_SENDER,
+    password=settings.EMAIL_PASSWORD,
+    use_tls=settings.SMTP_USE_TLS,
+    max_size=settings.SMTP_POOL_SIZE,
+    timeout=settings.SMTP_TIMEOUT_SECONDS,
+    health_check_after=settings.SMTP_HEALTH_CHECK_AFTER_SECONDS,
+    max_messages_per_connection=settings.SMTP_MAX_MESSAGES_PER_CONNECTION
+)
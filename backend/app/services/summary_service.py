@@ -0,0 +1,103 @@
+import asyncio
+import random
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.db import models
+from app.core.config import settings
+from app.services.llm_service import LLMService, llm_service
+
+
+class AppointmentSummaryService:
+    """Generates summaries for completed appointments in bulk.
+
+    Appointments are read in id order, in chunks, and only those still
+    without a summary are selected. Summaries of a chunk are generated
+    concurrently (bounded by `concurrency`) and committed together, so an
+    interrupted run simply picks up the remaining appointments next time.
+    """
+
+    def __init__(self, llm: Optional[LLMService] = None, concurrency: int = None,
+                 max_retries: int = None, chunk_size: int = None):
+        self.llm = llm or llm_service
+        self.concurrency = concurrency or settings.SUMMARY_JOB_CONCURRENCY
+        self.max_retries = max_retries if max_retries is not None else settings.SUMMARY_JOB_MAX_RETRIES
+        self.chunk_size = chunk_size or self.concurrency * 4
+
+    def _next_chunk(self, db: Session, after_id: int) -> List[models.Appointment]:
+        return db.query(models.Appointment)\
+            .options(
+                joinedload(models.Appointment.doctor).joinedload(models.Doctor.user),
+                joinedload(models.Appointment.patient).joinedload(models.Patient.user)
+            )\
+            .filter(
+                models.Appointment.status == models.AppointmentStatus.COMPLETED,
+                models.Appointment.summary.is_(None),
+                models.Appointment.id > after_id
+            )\
+            .order_by(models.Appointment.id)\
+            .limit(self.chunk_size)\
+            .all()
+
+    @staticmethod
+    def _summary_data(appointment: models.Appointment) -> Dict[str, Any]:
+        return {
+            "doctor_name": appointment.doctor.user.full_name if appointment.doctor else None,
+            "specialization": appointment.doctor.specialization if appointment.doctor else None,
+            "patient_name": appointment.patient.user.full_name if appointment.patient else None,
+            "date_time": appointment.appointment_time.isoformat() if appointment.appointment_time else None,
+            "reason": appointment.reason,
+            "diagnosis": appointment.diagnosis,
+        }
+
+    async def _summarize(self, semaphore: asyncio.Semaphore, data: Dict[str, Any]) -> Optional[str]:
+        """Generate one summary, retrying with exponential backoff and jitter"""
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                try:
+                    return await self.llm.generate_appointment_summary_async(data, raise_errors=True)
+                except Exception as e:
+                    error = e
+            if attempt < self.max_retries:
+                await asyncio.sleep(min(2 ** attempt, 30) + random.random())
+        print(f"Giving up on appointment summary after {self.max_retries + 1} attempts: {error}")
+        return None
+
+    async def run(self, db: Session, limit: Optional[int] = None) -> Dict[str, int]:
+        """Summarize completed appointments without a summary; returns counts"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = {"processed": 0, "summarized": 0, "failed": 0}
+        last_id = 0
+
+        while limit is None or stats["processed"] < limit:
+            chunk = await asyncio.to_thread(self._next_chunk, db, last_id)
+            if limit is not None:
+                chunk = chunk[:limit - stats["processed"]]
+            if not chunk:
+                break
+
+            summaries = await asyncio.gather(*(
+                self._summarize(semaphore, self._summary_data(appointment)) for appointment in chunk
+            ))
+
+            now = datetime.utcnow()
+            for appointment, summary in zip(chunk, summaries):
+                if summary is None:
+                    stats["failed"] += 1
+                    continue
+                appointment.summary = summary
+                appointment.summary_generated_at = now
+                stats["summarized"] += 1
+            await asyncio.to_thread(db.commit)
+
+            stats["processed"] += len(chunk)
+            # Failed appointments keep summary NULL and are retried by the next run
+            last_id = chunk[-1].id
+            print(f"Summarized {stats['summarized']} appointments ({stats['failed']} failed) so far")
+
+        return stats
+
+
+summary_service = AppointmentSummaryService()
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, Depends, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import datetime, timedelta
@@ -6,16 +7,24 @@ from typing import Optional, Dict, Any, List
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import os
+import json
+import asyncio
 from dotenv import load_dotenv
 import google.generativeai as genai
 
 # Local imports
-from app.api.routes import appointments, reports, auth, doctors, patients
-from app.db.database import Base, engine
+from app.api.routes import appointments, reports, auth, doctors, patients, chat
+from app.db.database import Base, engine, get_supabase_client
 from app.core.security import get_current_user, get_current_active_user, get_current_doctor, get_current_patient
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.templates import templates
 from app.services.appointment_service import appointment_service
 from app.services.llm_service import llm_service  # This should use Gemini
+from app.services.health_service import health_prober
+from app.services.doctor_index import doctor_index
+from app.services.email_queue import email_queue
+from app.services.slack_dispatcher import slack_dispatcher
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -48,34 +57,55 @@ app.include_router(doctors.router, prefix="/api/doctors", tags=["Doctors"])
 app.include_router(patients.router, prefix="/api/patients", tags=["Patients"])
 app.include_router(appointments.router, prefix="/api/appointments", tags=["Appointments"])
 app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
+app.include_router(chat.router, prefix="/api/v1", tags=["Chat"])
+
+@app.on_event("startup")
+async def start_background_tasks():
+    templates.load_all()
+    health_prober.start()
+    email_queue.start()
+    asyncio.create_task(doctor_index.ensure_fresh())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await health_prober.stop()
+    await email_queue.stop()
+    await asyncio.to_thread(slack_dispatcher.close)
+
+# Liveness probe - no I/O, only proves the process is serving requests
+@app.get("/livez")
+async def liveness():
+    return {"status": "alive"}
+
+# Readiness probe - served from the background prober's cached status
+@app.get("/readyz")
+async def readiness():
+    ready = health_prober.ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", **health_prober.status}
+    )
 
 # Health check endpoint
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint for monitoring"""
-    try:
-        # Test database connection
-        supabase = get_supabase_client()
-        response = supabase.table("users").select("count").limit(1).execute()
-        db_status = "online" if response is not None else "offline"
-        
-        # Test Gemini API connection
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        gemini_response = model.generate_content("Hello")
-        gemini_status = "online" if gemini_response else "offline"
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-        gemini_status = "error"
-    
+    """Health check endpoint for monitoring (cached, see /readyz)"""
     return {
-        "status": "healthy",
+        "status": "healthy" if health_prober.ready else "degraded",
         "timestamp": datetime.utcnow().isoformat(),
         "version": "1.0.0",
-        "database": db_status,
-        "gemini_api": gemini_status,
+        "database": health_prober.status["database"],
+        "gemini_api": health_prober.status["gemini_api"],
+        "checked_at": health_prober.status["checked_at"],
         "environment": os.getenv("ENVIRONMENT", "development")
     }
 
+# Metrics endpoint for Prometheus scraping
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose process metrics in the Prometheus text format"""
+    return metrics.render_prometheus()
+
 # User endpoint - protected route example
 @app.get("/api/users/me", response_model=Dict[str, Any])
 async def read_users_me(current_user: Dict[str, Any] = Depends(get_current_active_user)):
@@ -84,7 +114,9 @@ async def read_users_me(current_user: Dict[str, Any] = Depends(get_current_activ
 
 # Doctor dashboard data endpoint
 @app.get("/api/dashboard/doctor")
-async def doctor_dashboard(current_doctor: Dict[str, Any] = Depends(get_current_doctor)):
+async def doctor_dashboard(
+    current_doctor: Dict[str, Any] = Depends(get_current_doctor)
+):
     """Get doctor dashboard data"""
     today = datetime.now().date()
     doctor_id = current_doctor["doctor_profile"]["id"]
@@ -144,7 +176,9 @@ async def doctor_dashboard(current_doctor: Dict[str, Any] = Depends(get_current_
 
 # Patient dashboard data endpoint
 @app.get("/api/dashboard/patient")
-async def patient_dashboard(current_patient: Dict[str, Any] = Depends(get_current_patient)):
+async def patient_dashboard(
+    current_patient: Dict[str, Any] = Depends(get_current_patient)
+):
     """Get patient dashboard data"""
     patient_id = current_patient["patient_profile"]["id"]
     
@@ -182,6 +216,10 @@ async def patient_dashboard(current_patient: Dict[str, Any] = Depends(get_curren
         "timestamp": datetime.utcnow().isoformat()
     }
 
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 # AI assistant endpoint for appointment suggestions using Gemini
 @app.post("/api/assistant/appointment-suggestion")
 async def get_appointment_suggestion(
@@ -191,42 +229,63 @@ async def get_appointment_suggestion(
 ):
     """Get AI-powered appointment suggestion based on symptoms using Google's Gemini"""
     try:
-        # Use the LLM service that's configured with Gemini
-        recommendation = llm_service.analyze_medical_data({
+        # Use the LLM service that's configured with Gemini (async, so other requests keep running)
+        recommendation = await llm_service.analyze_medical_data_async({
             "symptoms": symptoms,
             "medical_history": medical_history or "Not provided",
             "patient_info": f"Patient: {current_user['full_name']}"
         })
         
-        # Find matching doctors in the database
-        supabase = get_supabase_client()
-        
-        # Extract likely specialization from recommendation
-        specializations = ["Cardiologist", "Dermatologist", "Neurologist", "Gastroenterologist", 
-                          "Orthopedic", "General Physician", "Psychiatrist", "Pediatrician"]
-        
-        matching_doctors = []
-        for specialization in specializations:
-            if specialization.lower() in recommendation.lower():
-                # Found a potential match, search for doctors
-                response = supabase.table("doctors")\
-                    .select("*, users(full_name, email)")\
-                    .ilike("specialization", f"%{specialization}%")\
-                    .limit(3)\
-                    .execute()
-                
-                if response.data and len(response.data) > 0:
-                    matching_doctors.extend(response.data)
+        # Find matching doctors in the in-memory specialization index
+        await doctor_index.ensure_fresh()
+        matching_doctors = doctor_index.match(recommendation, limit=3)
         
         # Return recommendation and matching doctors
         return {
             "recommendation": recommendation,
-            "matching_doctors": matching_doctors[:3],  # Limit to top 3 matches
+            "matching_doctors": matching_doctors,
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating recommendation: {str(e)}")
 
+# Streaming variant of the assistant endpoint (server-sent events)
+@app.post("/api/assistant/appointment-suggestion/stream")
+async def stream_appointment_suggestion(
+    symptoms: str,
+    medical_history: Optional[str] = None,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Stream the recommendation as `token` events, then the matching doctors as a `doctors` event"""
+    data = {
+        "symptoms": symptoms,
+        "medical_history": medical_history or "Not provided",
+        "patient_info": f"Patient: {current_user['full_name']}"
+    }
+    
+    async def event_stream():
+        chunks = []
+        try:
+            async for text in llm_service.stream_medical_analysis_async(data):
+                chunks.append(text)
+                yield format_sse("token", {"text": text})
+            
+            recommendation = "".join(chunks)
+            await doctor_index.ensure_fresh()
+            matching_doctors = doctor_index.match(recommendation, limit=3)
+            yield format_sse("doctors", {"matching_doctors": matching_doctors})
+            yield format_sse("done", {"timestamp": datetime.utcnow().isoformat()})
+        except asyncio.TimeoutError:
+            yield format_sse("error", {"detail": "Error generating recommendation: the request timed out"})
+        except Exception as e:
+            yield format_sse("error", {"detail": f"Error generating recommendation: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Documentation customization
 def custom_openapi():
     if app.openapi_schema:
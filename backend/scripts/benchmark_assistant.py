@@ -0,0 +1,180 @@
+"""Load test for the appointment-suggestion assistant.
+
+Drives /api/assistant/appointment-suggestion (or its streaming variant) at
+increasing concurrency and reports throughput and p50/p95/p99 latency.
+
+By default the app is started in-process with the fake LLM provider and a
+stubbed user, so the numbers measure our own overhead (routing, caching,
+coalescing, doctor matching) without calling Gemini:
+
+    python scripts/benchmark_assistant.py --concurrency 1,4,16,64 --requests 200
+
+Against a running deployment, pass its URL and a bearer token:
+
+    python scripts/benchmark_assistant.py --url http://localhost:8000 --token <jwt>
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINT = "/api/assistant/appointment-suggestion"
+
+SAMPLE_DOCTORS = [
+    {"id": 1, "user_id": 1, "specialization": "Cardiologist", "users": {"full_name": "Dr. Vikram Ahuja", "email": "dr.ahuja@example.com"}},
+    {"id": 2, "user_id": 2, "specialization": "Dermatologist", "users": {"full_name": "Dr. Priya Sharma", "email": "dr.sharma@example.com"}},
+    {"id": 3, "user_id": 3, "specialization": "General Physician", "users": {"full_name": "Dr. Raj Patel", "email": "dr.patel@example.com"}},
+    {"id": 4, "user_id": 4, "specialization": "Neurologist", "users": {"full_name": "Dr. Anita Rao", "email": "dr.rao@example.com"}},
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the appointment-suggestion assistant")
+    parser.add_argument("--url", help="Base URL of a running server (default: start one in-process)")
+    parser.add_argument("--token", help="Bearer token when benchmarking a running server")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per concurrency level")
+    parser.add_argument("--stream", action="store_true", help="Use the SSE streaming endpoint")
+    parser.add_argument("--distinct-symptoms", type=int, default=0,
+                        help="Cycle through this many symptom texts (0 = every request unique, so no cache hits)")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM time to first token (in-process only)")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="Fake LLM token rate (in-process only)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fake LLM failure rate (in-process only)")
+    parser.add_argument("--max-llm-concurrency", type=int, default=64, help="LLM_MAX_CONCURRENCY (in-process only)")
+    return parser.parse_args()
+
+
+def start_in_process_server(args) -> str:
+    """Start the app with the fake LLM provider on a free local port"""
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_KEY", "benchmark")
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_SECONDS"] = str(args.latency)
+    os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["FAKE_LLM_FAILURE_RATE"] = str(args.failure_rate)
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.max_llm_concurrency)
+    os.environ["LLM_CACHE_PATH"] = ""
+
+    import uvicorn
+    from main import app
+    from app.core.security import get_current_active_user
+    from app.services.doctor_index import doctor_index
+
+    async def benchmark_user():
+        return {"id": 0, "full_name": "Benchmark Patient", "role": "patient", "is_active": True}
+
+    app.dependency_overrides[get_current_active_user] = benchmark_user
+    doctor_index.load(SAMPLE_DOCTORS)
+    doctor_index.max_age_seconds = float("inf")
+    app.router.on_startup.clear()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_level(session, url, headers, concurrency, total, stream, distinct, offset):
+    latencies = []
+    first_byte = []
+    errors = 0
+    counter = iter(range(offset, offset + total))
+
+    async def one(i):
+        nonlocal errors
+        symptoms = f"persistent cough and chest pain, case {i % distinct if distinct else i}"
+        started = time.perf_counter()
+        try:
+            async with session.post(url, params={"symptoms": symptoms}, headers=headers) as response:
+                failed = response.status != 200
+                if stream:
+                    first = None
+                    body = bytearray()
+                    async for chunk in response.content.iter_any():
+                        if first is None:
+                            first = time.perf_counter() - started
+                        body.extend(chunk)
+                    # Failures after the headers are sent arrive as an `error` event with status 200
+                    failed = failed or b"event: error" in body
+                    if not failed:
+                        first_byte.append(first or 0.0)
+                else:
+                    await response.read()
+                if failed:
+                    errors += 1
+                    return
+        except aiohttp.ClientError:
+            errors += 1
+            return
+        latencies.append(time.perf_counter() - started)
+
+    async def worker():
+        for i in counter:
+            await one(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "ttfb_p50": percentile(first_byte, 50) if stream else None,
+    }
+
+
+async def main():
+    args = parse_args()
+    base_url = args.url.rstrip("/") if args.url else start_in_process_server(args)
+    url = base_url + ENDPOINT + ("/stream" if args.stream else "")
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    print(f"Benchmarking {url}")
+    print(f"{'conc':>5} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+          + (f" {'ttfb p50':>9}" if args.stream else ""))
+
+    connector = aiohttp.TCPConnector(limit=max(levels))
+    async with aiohttp.ClientSession(connector=connector) as session:
+        for level, concurrency in enumerate(levels):
+            # Unique symptom texts across levels too, so later levels don't hit the response cache
+            offset = 0 if args.distinct_symptoms else level * args.requests
+            result = await run_level(
+                session, url, headers, concurrency, args.requests, args.stream,
+                args.distinct_symptoms, offset
+            )
+            line = (f"{result['concurrency']:>5} {result['requests']:>6} {result['errors']:>6} "
+                    f"{result['throughput']:>9.1f} {result['p50'] * 1000:>9.1f} "
+                    f"{result['p95'] * 1000:>9.1f} {result['p99'] * 1000:>9.1f}")
+            if args.stream:
+                line += f" {result['ttfb_p50'] * 1000:>9.1f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""Throughput of pooled vs per-message SMTP connections.
+
+Starts a local aiosmtpd server that accepts and counts messages, then sends
+the same batch of emails twice: once opening a connection per message (what
+EmailService did before the pool) and once through SMTPConnectionPool.
+
+    python scripts/benchmark_smtp.py --messages 500 --concurrency 8
+
+--handshake-delay adds latency to every EHLO to stand in for the TLS
+handshake and login round trips of a real provider, which is where the pool
+saves most.
+"""
+import argparse
+import asyncio
+import os
+import smtplib
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+
+from aiosmtpd.controller import Controller
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+from app.services.smtp_pool import SMTPConnectionPool
+
+SENDER = "noreply@example.com"
+
+
+class CountingHandler:
+    def __init__(self, handshake_delay: float):
+        self.handshake_delay = handshake_delay
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 Message accepted for delivery"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark pooled SMTP delivery against a local aiosmtpd server")
+    parser.add_argument("--messages", type=int, default=500, help="Messages per run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Sending threads")
+    parser.add_argument("--pool-size", type=int, default=8, help="SMTP connections in the pool")
+    parser.add_argument("--handshake-delay", type=float, default=0.02, help="Seconds added to each EHLO")
+    return parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_message(i: int) -> str:
+    message = MIMEText(f"<p>Reminder {i}</p>", "html")
+    message["Subject"] = f"Appointment reminder {i}"
+    message["From"] = SENDER
+    message["To"] = f"patient{i}@example.com"
+    return message.as_string()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def run(name, send, messages, concurrency):
+    latencies = []
+
+    def one(i):
+        started = time.perf_counter()
+        send(f"patient{i}@example.com", messages[i])
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(one, range(len(messages))))
+    elapsed = time.perf_counter() - started
+    print(f"{name:>12} {len(messages) / elapsed:>9.1f} {percentile(latencies, 50) * 1000:>9.1f} "
+          f"{percentile(latencies, 95) * 1000:>9.1f}")
+
+
+def main():
+    args = parse_args()
+    port = free_port()
+    handler = CountingHandler(args.handshake_delay)
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+
+    messages = [build_message(i) for i in range(args.messages)]
+
+    def per_message(recipient, message):
+        with smtplib.SMTP("127.0.0.1", port, timeout=10) as smtp:
+            smtp.ehlo()
+            smtp.sendmail(SENDER, recipient, message)
+
+    pool = SMTPConnectionPool("127.0.0.1", port, use_tls=False, max_size=args.pool_size)
+
+    print(f"{args.messages} messages, {args.concurrency} threads, {args.handshake_delay * 1000:.0f} ms handshake")
+    print(f"{'mode':>12} {'msg/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    try:
+        run("per-message", per_message, messages, args.concurrency)
+        run("pooled", lambda recipient, message: pool.send(SENDER, recipient, message), messages, args.concurrency)
+    finally:
+        pool.close_all()
+        controller.stop()
+    print(f"Server received {handler.received} messages")
+
+
+if __name__ == "__main__":
+    main()
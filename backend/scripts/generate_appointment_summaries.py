@@ -0,0 +1,46 @@
+"""Generate LLM summaries for completed appointments that don't have one yet.
+
+Safe to interrupt and re-run: appointments that already have a summary are
+skipped, so a new run resumes where the previous one stopped.
+
+    python scripts/generate_appointment_summaries.py --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import SessionLocal
+from app.services.summary_service import AppointmentSummaryService
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Summarize completed appointments")
+    parser.add_argument("--concurrency", type=int, default=None, help="Concurrent LLM calls")
+    parser.add_argument("--retries", type=int, default=None, help="Retries per appointment")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many appointments")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    if SessionLocal is None:
+        print("Database is not configured (DATABASE_URL)")
+        sys.exit(1)
+
+    service = AppointmentSummaryService(concurrency=args.concurrency, max_retries=args.retries)
+    db = SessionLocal()
+    try:
+        stats = await service.run(db, limit=args.limit)
+    finally:
+        db.close()
+
+    print(f"Done: {stats['summarized']} summarized, {stats['failed']} failed, {stats['processed']} processed")
+    if stats["failed"]:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
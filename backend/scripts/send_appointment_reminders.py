@@ -0,0 +1,52 @@
+"""Email patients a reminder of their appointments tomorrow.
+
+Safe to interrupt and re-run: appointments whose reminder was already sent
+are skipped, so a new run only sends the missing ones.
+
+    python scripts/send_appointment_reminders.py --concurrency 8
+    python scripts/send_appointment_reminders.py --date 2026-10-21
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import SessionLocal
+from app.services.reminder_service import AppointmentReminderService
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Send next-day appointment reminders")
+    parser.add_argument("--date", type=date.fromisoformat, default=None,
+                        help="Day of the appointments (YYYY-MM-DD), tomorrow by default")
+    parser.add_argument("--concurrency", type=int, default=None, help="SMTP batches sent at once")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Appointments read per query")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many appointments")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    if SessionLocal is None:
+        print("Database is not configured (DATABASE_URL)")
+        sys.exit(1)
+
+    service = AppointmentReminderService(concurrency=args.concurrency, chunk_size=args.chunk_size)
+    db = SessionLocal()
+    try:
+        stats = await service.run(db, day=args.date, limit=args.limit)
+    finally:
+        db.close()
+        service.pool.close_all()
+
+    print(f"Done: {stats['sent']} sent, {stats['failed']} failed, {stats['skipped']} skipped, "
+          f"{stats['processed']} processed")
+    if stats["failed"]:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())